@@ -0,0 +1,77 @@
+from django.contrib import admin
+from django.db.models import Prefetch
+
+from .metrics import percentile
+from .models import SlowQuery, SlowQuerySample
+
+
+class SlowQuerySampleInline(admin.StackedInline):
+    model = SlowQuerySample
+    extra = 0
+    can_delete = False
+    fields = (
+        'created',
+        'duration',
+        'view',
+        'template',
+        'call_site',
+        'sql',
+        'params',
+        'plan',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'sql',
+        'count',
+        'total_time',
+        'p50',
+        'p95',
+        'max_time',
+        'last_seen',
+    )
+    search_fields = ('sql', 'samples__view')
+    readonly_fields = (
+        'fingerprint',
+        'sql',
+        'count',
+        'total_time',
+        'max_time',
+        'first_seen',
+        'last_seen',
+    )
+    inlines = (SlowQuerySampleInline,)
+
+    def get_queryset(self, request):
+        # Перцентили считаются по примерам, их не больше
+        # SLOW_QUERY_SAMPLES на запрос — одним запросом на страницу.
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                'samples',
+                queryset=SlowQuerySample.objects.only('query', 'duration'),
+                to_attr='sample_list',
+            )
+        )
+
+    def _durations(self, obj):
+        return [sample.duration for sample in obj.sample_list]
+
+    def p50(self, obj):
+        return percentile(self._durations(obj), 50)
+
+    def p95(self, obj):
+        return percentile(self._durations(obj), 95)
+
+    p50.short_description = 'p50, с'
+    p95.short_description = 'p95, с'
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import instrumentation, metrics, tracing
+        instrumentation.install()
+        instrumentation.add_template_hook(metrics.timed_template)
+        instrumentation.add_template_hook(tracing.template_span)
+        instrumentation.add_hook('url', tracing.url_span)
@@ -0,0 +1,95 @@
+"""Фоновые потоки, которые сбрасывают буферы процесса в базу.
+
+Запрос только кладёт данные в буфер в памяти, а записывает их
+`Flusher` — поток процесса, который вызывает `flush()` раз в
+`interval` секунд и раньше, если его разбудили через `wake()`.
+
+`lazy()` запускает поток при первом обращении и помнит, в каком
+процессе он запущен. Сервер, загружающий приложение до fork (gunicorn
+`--preload`, uWSGI без lazy-apps), оставил бы дочерним процессам объект
+без потока; здесь дочерний процесс при первом обращении запускает свой.
+При выходе процесса буфер сбрасывается последний раз.
+
+Потоки запускаются только в процессах сервера: их разрешает `enable()`
+из yatube/wsgi.py. В тестах и командах управления `lazy()` потока не
+даёт, и буфер сбрасывают явным вызовом `flush()` — иначе поток писал
+бы в базу посреди теста, а при выходе — уже после удаления тестовой.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+_enabled = False
+
+
+def enable():
+    """Разрешает фоновые потоки; процессы после fork наследуют флаг."""
+    global _enabled
+    _enabled = True
+
+
+class Flusher:
+    """Поток, вызывающий `flush()` раз в `interval` секунд и по `wake()`."""
+
+    def __init__(self, flush, interval, name):
+        self.flush = flush
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=name,
+            daemon=True,
+        )
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        """Сбрасывает остаток буфера и завершает поток."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Сбой потока %s', self._thread.name)
+            close_old_connections()
+        connection.close()
+
+
+def lazy(flush, setting, name):
+    """Функция, возвращающая поток сброса текущего процесса или None,
+    если потоки не разрешены; интервал берётся из настройки `setting`
+    при запуске потока."""
+    lock = threading.Lock()
+    state = {'pid': None, 'flusher': None}
+
+    def get():
+        if not _enabled:
+            return None
+        pid = os.getpid()
+        if state['pid'] != pid:
+            with lock:
+                if state['pid'] != pid:
+                    interval = getattr(settings, setting)
+                    flusher = Flusher(flush, interval, name)
+                    atexit.register(flusher.stop)
+                    state['flusher'], state['pid'] = flusher, pid
+        return state['flusher']
+
+    return get
@@ -0,0 +1,89 @@
+"""Бэкенд кэша с метриками и версии для ключей кэша.
+
+Версия `name` лежит под `<name>:version` без срока в кэше `shared`,
+общем для всех процессов, — основной кэш у каждого процесса свой. Ключи,
+собранные `versioned_key()`, включают текущую версию, так что
+`invalidate()` разом делает устаревшими все значения этого имени во
+всех процессах. Процесс помнит прочитанную версию `CACHE_VERSION_TTL`
+секунд, поэтому другие процессы видят новую версию с такой задержкой.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+# {name: (версия, когда прочитана)}
+_versions = {}
+
+
+def _cache_name(key):
+    # Ключи тега {% cache %} начинаются с template.cache.
+    if key.startswith('template.cache.'):
+        return 'fragment'
+    return 'default'
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, который считает попадания и промахи."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        CACHE_REQUESTS.inc(
+            cache=_cache_name(key),
+            result='miss' if value is _MISSING else 'hit',
+        )
+        return default if value is _MISSING else value
+
+    def clear(self):
+        super().clear()
+        _versions.clear()
+
+
+def _version_key(name):
+    return f'{name}:version'
+
+
+def shared():
+    """Кэш, общий для всех процессов."""
+    return caches['shared']
+
+
+def invalidate(name):
+    shared().set(_version_key(name), uuid.uuid4().hex, None)
+    _versions.pop(name, None)
+
+
+def invalidate_on_commit(name):
+    """Меняет версию сразу — в транзакции — и ещё раз после коммита:
+    другой запрос мог между ними прочитать старые данные и положить их в
+    кэш под новой версией."""
+    invalidate(name)
+    transaction.on_commit(lambda: invalidate(name))
+
+
+def version(name):
+    """Текущая версия `name`; годится как часть ключей кэша."""
+    now = time.monotonic()
+    remembered = _versions.get(name)
+    if remembered is not None:
+        current, read_at = remembered
+        if now - read_at < settings.CACHE_VERSION_TTL:
+            return current
+    key = _version_key(name)
+    current = shared().get(key)
+    if current is None:
+        shared().add(key, uuid.uuid4().hex, None)
+        current = shared().get(key)
+    _versions[name] = (current, now)
+    return current
+
+
+def versioned_key(name, *parts):
+    return ':'.join([name, version(name), *map(str, parts)])
@@ -0,0 +1,57 @@
+"""HyperLogLog — оценка числа различных значений в фиксированной памяти.
+
+Значение хэшируется в 64 бита: первые `precision` бит выбирают регистр,
+в регистре хранится наибольшая позиция первой единицы среди остальных
+бит. Регистров `2 ** precision` по байту; при точности 10 это 1 КиБ и
+стандартная ошибка около 3 %. Два скетча с одной точностью
+объединяются поэлементным максимумом регистров, так что копии из разных
+процессов и из базы складываются без потерь.
+"""
+import hashlib
+import math
+
+
+def _hash(value):
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    def __init__(self, precision, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            registers = bytes(self.size)
+        if len(registers) != self.size:
+            raise ValueError(
+                f'Ожидалось {self.size} регистров, получено {len(registers)}'
+            )
+        self.registers = bytearray(registers)
+
+    def add(self, value):
+        hashed = _hash(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError('Скетчи с разной точностью не объединяются')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(
+            2.0 ** -register for register in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Малые количества точнее оцениваются по пустым регистрам.
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def __bytes__(self):
+        return bytes(self.registers)
@@ -0,0 +1,67 @@
+"""Точки подключения для замеров: текущий запрос, шаблоны и `{% url %}`.
+
+Django не сообщает о рендере шаблонов вне тестов, поэтому
+`Template.render` и `URLNode.render` оборачиваются один раз при старте
+приложения `core`. Хуки — функции, которые получают шаблон или узел и
+возвращают контекстный менеджер вокруг его рендера; без хуков обёртка
+ничего не делает.
+"""
+import threading
+from contextlib import ExitStack
+
+from django.template.base import Template
+from django.template.defaulttags import URLNode
+
+_local = threading.local()
+_hooks = {
+    'template': [],
+    'url': [],
+}
+
+
+def set_current_request(request):
+    _local.request = request
+
+
+def get_current_request():
+    return getattr(_local, 'request', None)
+
+
+def current_view_name():
+    request = get_current_request()
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name
+
+
+def add_template_hook(hook):
+    add_hook('template', hook)
+
+
+def add_hook(kind, hook):
+    if hook not in _hooks[kind]:
+        _hooks[kind].append(hook)
+
+
+def _wrap(cls, kind):
+    original = cls.render
+    if getattr(original, 'instrumented', False):
+        return
+    hooks = _hooks[kind]
+
+    def render(self, context):
+        if not hooks:
+            return original(self, context)
+        with ExitStack() as stack:
+            for hook in hooks:
+                stack.enter_context(hook(self))
+            return original(self, context)
+
+    render.instrumented = True
+    cls.render = render
+
+
+def install():
+    _wrap(Template, 'template')
+    _wrap(URLNode, 'url')
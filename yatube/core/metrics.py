@@ -0,0 +1,294 @@
+"""Метрики процесса в формате Prometheus.
+
+Каждый процесс держит счётчики и гистограммы в памяти. Если задан
+`METRICS_DIR`, процесс не чаще раза в `METRICS_FLUSH_INTERVAL` секунд
+сбрасывает своё состояние в `METRICS_DIR/<pid>.json`, а `/metrics`
+суммирует файлы всех воркеров, так что любой из них отдаёт общую
+картину.
+
+Файл воркера удаляется при его выходе, а файлы процессов, которых уже
+нет (воркер убит и не успел убрать за собой), удаляет `collect()`.
+Счётчики такого воркера пропадают из суммы; Prometheus видит это как
+сброс счётчика, который `rate()` и `increase()` учитывают.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_metrics = {}
+_lock = threading.Lock()
+_last_dump = 0
+_dump_pid = None
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _metrics[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def state(self):
+        with _lock:
+            values = [
+                [list(key), value]
+                for key, value in self._values.items()
+            ]
+        return {
+            'kind': self.kind,
+            'documentation': self.documentation,
+            'labelnames': list(self.labelnames),
+            'values': values,
+        }
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            # Счётчики корзин, затем сумма и количество наблюдений.
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def state(self):
+        state = super().state()
+        state['buckets'] = list(self.buckets)
+        return state
+
+
+def percentile(values, percent):
+    """Перцентиль выборки по ближайшему рангу; None для пустой."""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+def snapshot():
+    return {name: metric.state() for name, metric in _metrics.items()}
+
+
+def _path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def dump(force=False):
+    """Сбрасывает состояние процесса в `METRICS_DIR`."""
+    global _last_dump, _dump_pid
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_dump < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_dump = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    pid = os.getpid()
+    path = _path(pid)
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(snapshot(), file)
+    os.replace(f'{path}.tmp', path)
+    if _dump_pid != pid:
+        # Процесс после fork наследует флаг родителя, поэтому он
+        # привязан к pid.
+        _dump_pid = pid
+        atexit.register(_remove, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _other_processes():
+    if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+        return []
+    states = []
+    for filename in os.listdir(settings.METRICS_DIR):
+        pid, extension = os.path.splitext(filename)
+        if extension != '.json' or not pid.isdigit():
+            continue
+        if int(pid) == os.getpid():
+            continue
+        path = os.path.join(settings.METRICS_DIR, filename)
+        if not _alive(int(pid)):
+            _remove(path)
+            continue
+        try:
+            with open(path) as file:
+                states.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return states
+
+
+def collect():
+    """Состояние всех процессов, сложенное по именам и меткам."""
+    merged = {}
+    for state in [snapshot()] + _other_processes():
+        for name, metric in state.items():
+            target = merged.setdefault(name, dict(metric, values={}))
+            for labels, value in metric['values']:
+                key = tuple(labels)
+                current = target['values'].get(key)
+                if current is None:
+                    target['values'][key] = value
+                elif metric['kind'] == 'counter':
+                    target['values'][key] = current + value
+                else:
+                    target['values'][key] = [
+                        a + b for a, b in zip(current, value)
+                    ]
+    return merged
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"'),
+        )
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def render():
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for name, metric in sorted(collect().items()):
+        lines.append(f'# HELP {name} {metric["documentation"]}')
+        lines.append(f'# TYPE {name} {metric["kind"]}')
+        names = metric['labelnames']
+        for key, value in sorted(metric['values'].items()):
+            if metric['kind'] == 'counter':
+                lines.append(f'{name}{_labels(names, key)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric['buckets'], value):
+                cumulative += count
+                labels = _labels(names, key, [('le', bound)])
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = _labels(names, key, [('le', '+Inf')])
+            lines.append(f'{name}_bucket{labels} {value[-1]}')
+            lines.append(f'{name}_sum{_labels(names, key)} {value[-2]}')
+            lines.append(f'{name}_count{_labels(names, key)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds',
+    'Время обработки запроса',
+    ['view', 'method'],
+)
+REQUESTS = Counter(
+    'yatube_requests_total',
+    'Обработанные запросы',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'yatube_request_queries',
+    'SQL-запросов на один HTTP-запрос',
+    ['view'],
+    buckets=COUNT_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    'yatube_db_query_duration_seconds',
+    'Время выполнения SQL-запроса',
+    ['view'],
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_render_seconds',
+    'Время рендера шаблона, включая вложенные',
+    ['template'],
+)
+CACHE_REQUESTS = Counter(
+    'yatube_cache_requests_total',
+    'Обращения к кэшу',
+    ['cache', 'result'],
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_seconds',
+    'Время получения миниатюры',
+)
+PAGINATOR_COUNTS = Counter(
+    'yatube_paginator_count_queries_total',
+    'Запросы COUNT(*) паджинатора',
+    ['view'],
+)
+RATE_LIMITED = Counter(
+    'yatube_rate_limited_total',
+    'Запросы, отклонённые ограничением частоты',
+    ['view'],
+)
+SHED_REQUESTS = Counter(
+    'yatube_shed_requests_total',
+    'Запросы, не выполненные из-за перегрузки',
+    ['view'],
+)
+
+
+@contextmanager
+def timed_template(template):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TEMPLATE_DURATION.observe(
+            time.perf_counter() - start,
+            template=template.origin.template_name or 'string',
+        )
@@ -0,0 +1,238 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.shortcuts import render
+
+from . import metrics, profiling, ratelimit, shedding, slowlog, tracing
+from .instrumentation import current_view_name, set_current_request
+
+
+class MetricsMiddleware:
+    """Время ответа, число и время SQL-запросов по имени URL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        set_current_request(request)
+        queries = 0
+
+        def execute_wrapper(execute, sql, params, many, context):
+            nonlocal queries
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries += 1
+                metrics.QUERY_DURATION.observe(
+                    time.perf_counter() - start,
+                    view=current_view_name(),
+                )
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(execute_wrapper):
+                response = self.get_response(request)
+            view = current_view_name()
+        finally:
+            set_current_request(None)
+        metrics.REQUEST_DURATION.observe(
+            time.perf_counter() - start,
+            view=view,
+            method=request.method,
+        )
+        metrics.REQUESTS.inc(
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        metrics.REQUEST_QUERIES.observe(queries, view=view)
+        metrics.dump()
+        return response
+
+
+class TracingMiddleware:
+    """Пишет трассу для выборки запросов, см. core/tracing.py.
+
+    Должен стоять в MIDDLEWARE как можно выше, а `ViewTracingMiddleware`
+    — последним.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.TRACING_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        tracing.start_trace(f'{request.method} {request.path}')
+
+        def execute_wrapper(execute, sql, params, many, context):
+            trace = tracing.current_trace()
+            with tracing.span(
+                sql[:60],
+                'sql',
+                sql=sql,
+                call_site=tracing.call_site(),
+                template=trace.current_template(),
+            ):
+                return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            trace = tracing.finish_trace()
+        response['X-Trace-Id'] = trace.id
+        return response
+
+
+class SlowQueryMiddleware:
+    """Сохраняет SQL-запросы дольше порога, см. core/slowlog.py.
+
+    Стоит сразу после TracingMiddleware, чтобы в замер не попадали
+    обёртки внешних middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        if threshold is None:
+            return self.get_response(request)
+        slow = []
+
+        def execute_wrapper(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                if duration >= threshold:
+                    slow.append(slowlog.capture(sql, params, many, duration))
+
+        with connection.execute_wrapper(execute_wrapper):
+            response = self.get_response(request)
+        if slow:
+            match = getattr(request, 'resolver_match', None)
+            slowlog.record(slow, match.view_name if match else 'unmatched')
+        return response
+
+
+class ViewTracingMiddleware:
+    """Выделяет вызов вьюхи в отдельный интервал трассы.
+
+    Интервал открывается в `process_view` и закрывается, когда Django
+    вернул ответ, включая рендер TemplateResponse; исключение вьюхи
+    записывается в интервал в `process_exception`. Вьюху вызывает сам
+    Django, поэтому `process_exception` других middleware и
+    `ATOMIC_REQUESTS` работают как обычно. Стоит последним в MIDDLEWARE,
+    чтобы в интервал не попадали `process_view` остальных.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            tracing.close_span(getattr(request, '_view_span', None))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = getattr(request.resolver_match, 'view_name', None)
+        request._view_span = tracing.open_span(f'view {name}', 'view')
+
+    def process_exception(self, request, exception):
+        span = getattr(request, '_view_span', None)
+        if span is not None:
+            span.args['error'] = type(exception).__name__
+            tracing.close_span(span)
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос по подписанному токену, см. core/profiling.py.
+
+    Стоит после AuthenticationMiddleware: токен сверяется с пользователем.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.is_requested(request):
+            return self.get_response(request)
+        response, profile_id = profiling.run(request, self.get_response)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+
+class LoadSheddingMiddleware:
+    """Отказывает второстепенным страницам при перегрузке, см.
+    core/shedding.py.
+
+    Стоит сразу после SlowQueryMiddleware, чтобы в счёт запросов в работе
+    попадало почти всё время их обработки.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        shedding.started()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            shedding.finished(time.perf_counter() - start)
+        if getattr(request, '_shed_remember', False):
+            shedding.remember(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        if not shedding.sheddable(name, request):
+            return None
+        if not shedding.overloaded():
+            request._shed_remember = True
+            return None
+        metrics.SHED_REQUESTS.inc(view=name)
+        stale = shedding.stale_page(request)
+        if stale is not None:
+            content, content_type = stale
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Stale'] = '1'
+            return response
+        response = render(request, 'core/503.html', status=503)
+        response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов по правилам `RATE_LIMITS`, см.
+    core/ratelimit.py.
+
+    Стоит после AuthenticationMiddleware: корзины ведутся и по
+    пользователю.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        name = request.resolver_match.view_name
+        wait = ratelimit.check(name, request)
+        if not wait:
+            return None
+        metrics.RATE_LIMITED.inc(view=name)
+        response = render(request, 'core/429.html', status=429)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
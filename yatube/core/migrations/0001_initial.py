@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('sql', models.TextField(verbose_name='Нормализованный SQL')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Сколько раз')),
+                ('total_time', models.FloatField(default=0, verbose_name='Суммарное время, с')),
+                ('max_time', models.FloatField(default=0, verbose_name='Худшее время, с')),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ['-total_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlowQuerySample',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('duration', models.FloatField(verbose_name='Время, с')),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('template', models.CharField(blank=True, max_length=200, verbose_name='Шаблон')),
+                ('call_site', models.CharField(blank=True, max_length=300, verbose_name='Место вызова')),
+                ('plan', models.TextField(blank=True, verbose_name='План')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('query', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='core.SlowQuery')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
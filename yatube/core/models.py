@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Медленные запросы одного вида: SQL без значений параметров."""
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField('Нормализованный SQL')
+    count = models.PositiveIntegerField('Сколько раз', default=0)
+    total_time = models.FloatField('Суммарное время, с', default=0)
+    max_time = models.FloatField('Худшее время, с', default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-total_time']
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+
+    def __str__(self):
+        return self.sql[:80]
+
+
+class SlowQuerySample(models.Model):
+    """Один медленный запрос с параметрами, местом вызова и планом."""
+
+    query = models.ForeignKey(
+        SlowQuery,
+        on_delete=models.CASCADE,
+        related_name='samples',
+    )
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    duration = models.FloatField('Время, с')
+    view = models.CharField(max_length=200, blank=True)
+    template = models.CharField('Шаблон', max_length=200, blank=True)
+    call_site = models.CharField('Место вызова', max_length=300, blank=True)
+    plan = models.TextField('План', blank=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created']
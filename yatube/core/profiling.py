@@ -0,0 +1,125 @@
+"""Профилирование отдельных запросов по требованию.
+
+Сотрудник получает подписанный токен на странице /debug/profiles/ и
+передаёт его в заголовке `X-Profile` или параметре `?_profile=`. Такой
+запрос выполняется под cProfile и tracemalloc, а в `PROFILES_DIR`
+записываются `<id>.prof` для pstats/snakeviz и `<id>.txt` с самыми
+дорогими функциями и местами выделения памяти.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.core import signing
+
+SALT = 'core.profiling'
+HEADER = 'HTTP_X_PROFILE'
+PARAM = '_profile'
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 30
+
+# <дата>-<время>-<вьюха>-<pid>-<случайный суффикс>, см. run().
+_ID_RE = re.compile(r'^\d{8}-\d{6}-[\w.-]+-\d+-[0-9a-f]{8}$')
+
+
+def make_token(user):
+    return signing.dumps({'user': user.pk}, salt=SALT)
+
+
+def is_requested(request):
+    """Запрос несёт действующий токен текущего сотрудника."""
+    token = request.META.get(HEADER) or request.GET.get(PARAM)
+    user = getattr(request, 'user', None)
+    if not token or user is None or not user.is_staff:
+        return False
+    try:
+        data = signing.loads(
+            token,
+            salt=SALT,
+            max_age=settings.PROFILING_TOKEN_MAX_AGE,
+        )
+    except signing.BadSignature:
+        return False
+    return data.get('user') == user.pk
+
+
+def _report(stats, snapshot, title):
+    out = io.StringIO()
+    out.write(f'{title}\n\n')
+    stats.stream = out
+    stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    out.write('\nМеста выделения памяти (живые на конец запроса):\n\n')
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        out.write(f'{stat}\n')
+    return out.getvalue()
+
+
+def run(request, get_response):
+    """Выполняет запрос под профилировщиками; возвращает ответ и id."""
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(settings.PROFILING_TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        response = profiler.runcall(get_response, request)
+    finally:
+        duration = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if started_tracemalloc:
+            tracemalloc.stop()
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name.replace(':', '.') if match else 'unmatched'
+    # Время с точностью до секунды: суффикс не даёт двум запросам одной
+    # вьюхи в одну секунду перезаписать профили друг друга.
+    profile_id = (
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{view}-{os.getpid()}-'
+        f'{uuid.uuid4().hex[:8]}'
+    )
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILES_DIR, profile_id)
+    profiler.dump_stats(f'{path}.prof')
+    title = (
+        f'{request.method} {request.get_full_path()}\n'
+        f'Время: {duration * 1000:.1f} мс, '
+        f'пик памяти: {peak / 1024:.1f} КиБ'
+    )
+    with open(f'{path}.txt', 'w') as file:
+        file.write(_report(pstats.Stats(profiler), snapshot, title))
+    return response, profile_id
+
+
+def list_profiles():
+    if not os.path.isdir(settings.PROFILES_DIR):
+        return []
+    profiles = []
+    for filename in os.listdir(settings.PROFILES_DIR):
+        profile_id, extension = os.path.splitext(filename)
+        if extension != '.prof':
+            continue
+        stat = os.stat(os.path.join(settings.PROFILES_DIR, filename))
+        profiles.append({
+            'id': profile_id,
+            'created': stat.st_mtime,
+            'size': stat.st_size,
+        })
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def profile_path(profile_id, extension):
+    """Путь к файлу профиля или None для чужих и несуществующих имён."""
+    if not _ID_RE.match(profile_id) or extension not in ('prof', 'txt'):
+        return None
+    path = os.path.join(settings.PROFILES_DIR, f'{profile_id}.{extension}')
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,93 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+Правила задаются в `RATE_LIMITS` по имени URL (`'posts:add_comment'`):
+
+* `user` и `ip` — скорость вида `'10/m'` (`s`, `m`, `h`) для корзины
+  пользователя и корзины адреса. Ёмкость корзины равна числу запросов,
+  и за период она наполняется заново. Вошедший пользователь тратит
+  токен из обеих корзин, аноним — только из корзины адреса.
+* `methods` — методы, к которым применяется правило; по умолчанию все.
+* `min_page` — правило действует только для `?page=` не меньше этого
+  номера: глубокие страницы дороже первых.
+
+Корзины хранятся как `(токены, время)` в кэше `shared`, общем для всех
+процессов, иначе каждый процесс пропускал бы свой лимит. Чтение и запись
+корзины выполняются под блокировкой процесса; параллельные запросы из
+разных процессов изредка получают лишний токен.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .caches import shared
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60}
+
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """`'10/m'` -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def _page(request):
+    try:
+        return int(request.GET.get('page', 1))
+    except ValueError:
+        return 1
+
+
+def applies(rule, request):
+    methods = rule.get('methods')
+    if methods and request.method not in methods:
+        return False
+    min_page = rule.get('min_page')
+    return min_page is None or _page(request) >= min_page
+
+
+def _refill(key, rate, now):
+    capacity, period = parse_rate(rate)
+    tokens, updated = shared().get(key, (capacity, now))
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def take(buckets, now=None):
+    """Берёт по токену из корзин `[(ключ, скорость)]`; возвращает секунды
+    до появления токенов во всех или 0, если токены взяты.
+
+    Токен берётся только если он есть в каждой корзине: отказ одной
+    корзины не расходует остальные.
+    """
+    now = time.time() if now is None else now
+    buckets = [(f'ratelimit:{key}', rate) for key, rate in buckets]
+    with _lock:
+        tokens = [_refill(key, rate, now) for key, rate in buckets]
+        wait = 0
+        for (key, rate), left in zip(buckets, tokens):
+            capacity, period = parse_rate(rate)
+            if left < 1:
+                wait = max(wait, (1 - left) * period / capacity)
+        if wait:
+            return wait
+        for (key, rate), left in zip(buckets, tokens):
+            shared().set(key, (left - 1, now), parse_rate(rate)[1])
+    return 0
+
+
+def _buckets(name, rule, request):
+    if rule.get('user') and request.user.is_authenticated:
+        yield f'{name}:user:{request.user.pk}', rule['user']
+    if rule.get('ip'):
+        ip = request.META.get('REMOTE_ADDR', '')
+        yield f'{name}:ip:{ip}', rule['ip']
+
+
+def check(name, request):
+    """Секунды до повтора, если запрос превысил лимит, иначе 0."""
+    rule = settings.RATE_LIMITS.get(name)
+    if rule is None or not applies(rule, request):
+        return 0
+    return take(list(_buckets(name, rule, request)))
@@ -0,0 +1,30 @@
+"""Поиск по префиксу нормализованных строк.
+
+Строки хранятся в отдельной индексируемой колонке в нормализованном
+виде, а префикс ищется диапазоном `>= prefix AND < следующий префикс`:
+такой запрос идёт по обычному B-tree индексу, в отличие от `LIKE` и
+`istartswith`.
+"""
+import hashlib
+
+from django.db.models import Q
+
+
+def normalize(text):
+    """Нижний регистр, `ё` как `е`, одиночные пробелы."""
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def prefix_filter(field, prefix):
+    """Условие «значение `field` начинается с `prefix`»."""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def prefix_key(*parts):
+    """Ключ кэша для префикса: пробелы и управляющие символы запроса
+    недопустимы в ключах memcached, поэтому префикс — последняя часть
+    `parts` — заменяется хэшем фиксированной длины."""
+    *parts, prefix = parts
+    digest = hashlib.md5(prefix.encode()).hexdigest()
+    return ':'.join([*map(str, parts), digest])
@@ -0,0 +1,93 @@
+"""Сброс нагрузки для второстепенных страниц.
+
+Процесс считает запросы в работе и скользящее среднее времени ответа.
+Пока одно из них выше порога (`LOAD_SHED_MAX_IN_FLIGHT`,
+`LOAD_SHED_LATENCY`), страницы из `LOAD_SHED_ROUTES` не выполняются:
+анониму отдаётся последняя сохранённая копия страницы, если она есть,
+остальным — 503 с `Retry-After`. Запись, вход и прочие маршруты
+обслуживаются как обычно.
+
+Копии сохраняются из удачных GET-ответов анонимам на эти маршруты и
+живут `LOAD_SHED_STALE_TIMEOUT` секунд. Ключ копии — путь и параметры
+из `LOAD_SHED_PARAMS`; запросы с другими параметрами не сохраняются и
+копией не обслуживаются, так что произвольная строка запроса не
+плодит записей в кэше. Копия одной страницы перезаписывается не чаще
+раза в `LOAD_SHED_REFRESH_INTERVAL` секунд.
+"""
+import hashlib
+import threading
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Вес последнего запроса в скользящем среднем времени ответа.
+LATENCY_WEIGHT = 0.1
+
+_lock = threading.Lock()
+_in_flight = 0
+_latency = 0.0
+
+
+def started():
+    global _in_flight
+    with _lock:
+        _in_flight += 1
+
+
+def finished(duration):
+    global _in_flight, _latency
+    with _lock:
+        _in_flight -= 1
+        _latency += (duration - _latency) * LATENCY_WEIGHT
+
+
+def overloaded():
+    max_in_flight = settings.LOAD_SHED_MAX_IN_FLIGHT
+    latency = settings.LOAD_SHED_LATENCY
+    return (
+        max_in_flight is not None and _in_flight > max_in_flight
+        or latency is not None and _latency > latency
+    )
+
+
+def sheddable(name, request):
+    return request.method == 'GET' and name in settings.LOAD_SHED_ROUTES
+
+
+def _key(request):
+    params = urlencode(sorted(request.GET.items()))
+    page = hashlib.sha1(f'{request.path}?{params}'.encode()).hexdigest()
+    return f'shed:{page}'
+
+
+def _cacheable(request):
+    return (
+        not request.user.is_authenticated
+        and set(request.GET) <= settings.LOAD_SHED_PARAMS
+    )
+
+
+def remember(request, response):
+    if (
+        _cacheable(request)
+        and response.status_code == 200
+        and not response.streaming
+        and cache.add(
+            f'{_key(request)}:fresh',
+            1,
+            settings.LOAD_SHED_REFRESH_INTERVAL,
+        )
+    ):
+        cache.set(
+            _key(request),
+            (response.content, response['Content-Type']),
+            settings.LOAD_SHED_STALE_TIMEOUT,
+        )
+
+
+def stale_page(request):
+    """Сохранённые `(содержимое, тип)` страницы или None."""
+    if not _cacheable(request):
+        return None
+    return cache.get(_key(request))
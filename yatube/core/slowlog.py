@@ -0,0 +1,157 @@
+"""Журнал медленных SQL-запросов.
+
+`SlowQueryMiddleware` замечает запросы дольше `SLOW_QUERY_THRESHOLD`
+секунд и в конце HTTP-запроса сохраняет их вместе с параметрами,
+вьюхой, строкой шаблона, местом вызова и планом выполнения. Запросы,
+отличающиеся только значениями, сводятся в один `SlowQuery` по отпечатку
+нормализованного SQL; у каждого хранятся последние
+`SLOW_QUERY_SAMPLES` примеров.
+
+Запрос только кладёт замеченное в буфер процесса: планы и запись в
+базу выполняет фоновый поток раз в `SLOW_QUERY_FLUSH_INTERVAL` секунд,
+иначе медленные запросы стали бы ещё медленнее. Буфер ограничен
+`SLOW_QUERY_MAX_PENDING` запросами, лишнее отбрасывается.
+"""
+import hashlib
+import logging
+import re
+import sys
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import background, tracing
+from .models import SlowQuery, SlowQuerySample
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_RE = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+_lock = threading.Lock()
+# [(записи, имя вьюхи)]
+_pending = []
+
+
+def normalize(sql):
+    """SQL без литералов и с одинаковыми списками IN."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _SPACE_RE.sub(' ', sql.replace('%s', '?')).strip()
+    return _IN_RE.sub('IN (...)', sql)
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def template_line():
+    """Шаблон и строка узла, который сейчас рендерится."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return ''
+
+
+def capture(sql, params, many, duration):
+    """Снимок запроса в момент выполнения, пока стек ещё на месте."""
+    return {
+        'sql': sql,
+        'params': params,
+        'many': many,
+        'duration': duration,
+        'template': template_line(),
+        'call_site': tracing.call_site() or '',
+    }
+
+
+def explain(sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = (
+        'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # id, parent, notused, detail — отступ по глубине узла плана.
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return '\n'.join(lines)
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def save(records, view):
+    for record in records:
+        normalized = normalize(record['sql'])
+        plan = '' if record['many'] else explain(
+            record['sql'],
+            record['params'],
+        )
+        with transaction.atomic():
+            query, _ = SlowQuery.objects.get_or_create(
+                fingerprint=fingerprint(normalized),
+                defaults={'sql': normalized},
+            )
+            SlowQuery.objects.filter(pk=query.pk).update(
+                count=F('count') + 1,
+                total_time=F('total_time') + record['duration'],
+                max_time=Greatest('max_time', record['duration']),
+                last_seen=timezone.now(),
+            )
+            SlowQuerySample.objects.create(
+                query=query,
+                sql=record['sql'],
+                params=repr(record['params'])[:2000],
+                duration=record['duration'],
+                view=view,
+                template=record['template'],
+                call_site=record['call_site'][:300],
+                plan=plan,
+            )
+            stale = query.samples.order_by('-created', '-id').values_list(
+                'id',
+                flat=True,
+            )[settings.SLOW_QUERY_SAMPLES:]
+            SlowQuerySample.objects.filter(id__in=list(stale)).delete()
+
+
+def flush():
+    """Записывает буфер; возвращает число записанных HTTP-запросов."""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, []
+    for records, view in pending:
+        try:
+            save(records, view)
+        except Exception:
+            logger.exception('Не удалось записать медленные запросы')
+    return len(pending)
+
+
+flusher = background.lazy(flush, 'SLOW_QUERY_FLUSH_INTERVAL', 'slowlog')
+
+
+def record(records, view):
+    """Кладёт медленные запросы HTTP-запроса в буфер."""
+    with _lock:
+        if len(_pending) >= settings.SLOW_QUERY_MAX_PENDING:
+            return
+        _pending.append((records, view))
+    flusher()
@@ -0,0 +1,102 @@
+"""Кэш со stale-while-revalidate и защитой от одновременного пересчёта.
+
+Значение лежит в кэше вместе со сроком свежести и временем, за которое
+его посчитали, и хранится ещё `CACHE_STALE_GRACE` секунд после этого
+срока. Когда срок прошёл, пересчитывает один запрос — тот, кому
+достался замок `cache.add()`; остальные в это время получают прежнее
+значение, а не выстраиваются за базой.
+
+Чтобы записи, созданные одновременно, не истекали тоже одновременно,
+срок свежести укорачивается на случайную долю до `CACHE_TTL_JITTER`.
+Кроме того, пересчёт может начаться раньше срока с вероятностью, тем
+большей, чем ближе срок и чем дороже пересчёт (XFetch): дорогие
+значения обновляются заранее, пока старое ещё свежее.
+
+При промахе замок тоже нужен: иначе после очистки кэша базу разом
+нагрузят все запросы. Проигравшие до `CACHE_MISS_WAIT` секунд ждут,
+пока значение появится, а потом считают сами, но в кэш не пишут.
+
+Пересчитывает запрос, взявший замок, сам, а не фоновый поток:
+фрагменты шаблонов рендерятся в контексте своего запроса.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _expired(fresh_until, delta, now):
+    # -log(U) распределён экспоненциально, поэтому чаще всего сдвиг мал.
+    beta = settings.CACHE_EARLY_EXPIRATION_BETA
+    return now - delta * beta * math.log(1 - random.random()) >= fresh_until
+
+
+def _store(key, compute, timeout):
+    start = time.time()
+    value = compute()
+    now = time.time()
+    if timeout is None:
+        fresh_until, stored_for = math.inf, None
+    else:
+        jitter = random.uniform(1 - settings.CACHE_TTL_JITTER, 1)
+        fresh_until = now + timeout * jitter
+        stored_for = timeout + settings.CACHE_STALE_GRACE
+    cache.set(key, (value, fresh_until, now - start), stored_for)
+    return value
+
+
+def _locked_store(key, compute, timeout):
+    """Пересчитывает значение под замком; None, если замок занят."""
+    lock = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if not cache.add(lock, token, settings.CACHE_LOCK_TIMEOUT):
+        return None
+    try:
+        return (_store(key, compute, timeout),)
+    finally:
+        # Замок мог истечь и достаться другому запросу: удаляем только
+        # свой.
+        if cache.get(lock) == token:
+            cache.delete(lock)
+
+
+def _wait(key):
+    deadline = time.monotonic() + settings.CACHE_MISS_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_set(key, compute, timeout):
+    """Значение `key` из кэша; при промахе и по истечении срока
+    свежести — результат `compute()`.
+
+    `timeout` — срок свежести в секундах; None означает «хранить без
+    срока», как у обычного кэша.
+    """
+    if timeout is None:
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, None)
+        return value
+    entry = cache.get(key)
+    if entry is None:
+        stored = _locked_store(key, compute, timeout)
+        if stored is not None:
+            return stored[0]
+        entry = _wait(key)
+        if entry is None:
+            return compute()
+        return entry[0]
+    value, fresh_until, delta = entry
+    if not _expired(fresh_until, delta, time.time()):
+        return value
+    stored = _locked_store(key, compute, timeout)
+    return value if stored is None else stored[0]
@@ -0,0 +1,55 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.cache import CacheNode
+
+from core import swr
+
+register = template.Library()
+
+
+class StaleCacheNode(CacheNode):
+    def render(self, context):
+        try:
+            expire_time = self.expire_time_var.resolve(context)
+        except template.VariableDoesNotExist:
+            raise template.TemplateSyntaxError(
+                f'"swrcache" tag got an unknown variable: '
+                f'{self.expire_time_var.var!r}'
+            )
+        if expire_time is not None:
+            try:
+                expire_time = int(expire_time)
+            except (ValueError, TypeError):
+                raise template.TemplateSyntaxError(
+                    f'"swrcache" tag got a non-integer timeout value: '
+                    f'{expire_time!r}'
+                )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        return swr.get_or_set(
+            make_template_fragment_key(self.fragment_name, vary_on),
+            lambda: self.nodelist.render(context),
+            expire_time,
+        )
+
+
+@register.tag
+def swrcache(parser, token):
+    """`{% cache %}` через core/swr.py: по истечении срока фрагмент
+    пересчитывает один запрос, остальные получают прежний.
+
+        {% swrcache 20 index_page page_obj %}...{% endswrcache %}
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return StaleCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(bit) for bit in tokens[3:]],
+        None,
+    )
@@ -1,4 +1,31 @@
-from django.test import TestCase
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+
+from . import (background, caches, metrics, profiling, ratelimit, shedding,
+               slowlog, swr, tracing)
+from .hyperloglog import HyperLogLog
+from .models import SlowQuery, SlowQuerySample
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +33,571 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_estimate_close_to_distinct_count(self):
+        sketch = HyperLogLog(10)
+        for repeat in range(3):
+            for value in range(5000):
+                sketch.add(f'viewer:{value}')
+        self.assertAlmostEqual(sketch.count(), 5000, delta=5000 * 0.1)
+
+    def test_small_counts_nearly_exact(self):
+        sketch = HyperLogLog(10)
+        for value in range(20):
+            sketch.add(value)
+        self.assertEqual(HyperLogLog(10).count(), 0)
+        self.assertAlmostEqual(sketch.count(), 20, delta=1)
+
+    def test_merge_does_not_double_count(self):
+        first, second = HyperLogLog(10), HyperLogLog(10)
+        for value in range(1000):
+            first.add(value)
+            second.add(value + 500)
+        first.merge(HyperLogLog(10, bytes(second)))
+        self.assertAlmostEqual(first.count(), 1500, delta=1500 * 0.1)
+
+    def test_precision_mismatch(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(8))
+        with self.assertRaises(ValueError):
+            HyperLogLog(10, bytes(16))
+
+
+@override_settings(TEST_FLUSH_INTERVAL=3600)
+class BackgroundTests(SimpleTestCase):
+    def setUp(self):
+        self.flush = mock.Mock()
+        self.get = background.lazy(self.flush, 'TEST_FLUSH_INTERVAL', 'test')
+        patcher = mock.patch.object(background.atexit, 'register')
+        self.register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_no_thread_until_enabled(self):
+        with mock.patch.object(background, '_enabled', False):
+            self.assertIsNone(self.get())
+        self.register.assert_not_called()
+
+    def test_thread_per_process(self):
+        with mock.patch.object(background, '_enabled', True):
+            parent = self.get()
+            self.addCleanup(parent.stop)
+            self.assertIs(self.get(), parent)
+            with mock.patch.object(background.os, 'getpid', return_value=-1):
+                child = self.get()
+                self.addCleanup(child.stop)
+        self.assertIsNot(child, parent)
+        self.assertEqual(child.interval, 3600)
+        self.register.assert_has_calls(
+            [mock.call(parent.stop), mock.call(child.stop)],
+        )
+
+
+class CacheVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidate_changes_versioned_keys(self):
+        key = caches.versioned_key('things', 'count', 1)
+        self.assertTrue(key.startswith('things:'))
+        self.assertTrue(key.endswith(':count:1'))
+        self.assertEqual(caches.versioned_key('things', 'count', 1), key)
+        caches.invalidate('things')
+        self.assertNotEqual(caches.versioned_key('things', 'count', 1), key)
+
+    @override_settings(CACHE_VERSION_TTL=60)
+    def test_version_shared_between_processes(self):
+        old = caches.version('things')
+        # Другой процесс меняет версию в общем кэше.
+        caches.shared().set('things:version', 'new', None)
+        self.assertEqual(caches.version('things'), old)
+        with override_settings(CACHE_VERSION_TTL=0):
+            self.assertEqual(caches.version('things'), 'new')
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def test_metrics_forbidden_for_guests(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_with_token(self):
+        response = self.client.get(
+            '/metrics',
+            HTTP_AUTHORIZATION='Bearer secret',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_labelled_by_url_name(self):
+        self.client.get('/')
+        self.client.force_login(self.staff)
+        content = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="posts:index",method="GET"}',
+            content,
+        )
+        self.assertIn('yatube_template_render_seconds_bucket', content)
+        self.assertIn('yatube_paginator_count_queries_total', content)
+        self.assertIn('cache="fragment"', content)
+
+    def test_metrics_summed_across_processes(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        counter = metrics.Counter('test_total', 'Тест', ['kind'])
+        self.addCleanup(metrics._metrics.pop, 'test_total')
+        counter.inc(kind='a')
+        other = {'test_total': dict(counter.state(), values=[[['a'], 2]])}
+        with open(os.path.join(metrics_dir, '1.json'), 'w') as file:
+            json.dump(other, file)
+        with override_settings(METRICS_DIR=metrics_dir):
+            self.assertIn('test_total{kind="a"} 3', metrics.render())
+
+    def test_dead_processes_skipped_and_removed(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        counter = metrics.Counter('test_total', 'Тест', ['kind'])
+        self.addCleanup(metrics._metrics.pop, 'test_total')
+        counter.inc(kind='a')
+        process = subprocess.Popen(['true'])
+        process.wait()
+        path = os.path.join(metrics_dir, f'{process.pid}.json')
+        other = {'test_total': dict(counter.state(), values=[[['a'], 2]])}
+        with open(path, 'w') as file:
+            json.dump(other, file)
+        with override_settings(METRICS_DIR=metrics_dir):
+            self.assertIn('test_total{kind="a"} 1', metrics.render())
+        self.assertFalse(os.path.exists(path))
+
+    @mock.patch.object(metrics, '_dump_pid', None)
+    @mock.patch.object(metrics.atexit, 'register')
+    def test_own_file_removed_at_exit(self, register):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        with override_settings(METRICS_DIR=metrics_dir):
+            metrics.dump(force=True)
+            metrics.dump(force=True)
+        path = os.path.join(metrics_dir, f'{os.getpid()}.json')
+        register.assert_called_once_with(metrics._remove, path)
+        metrics._remove(path)
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(TRACING_SAMPLE_RATE=1)
+class TracingTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.post = Post.objects.create(
+            author=self.staff,
+            group=Group.objects.create(title='Группа', slug='group'),
+            text='Тест',
+        )
+        tracing._slowest.clear()
+
+    def get_trace(self, response):
+        return tracing.get_trace(response['X-Trace-Id'])
+
+    def test_trace_records_sql_templates_and_view(self):
+        response = self.client.get(
+            reverse('posts:profile', args=(self.staff.username,))
+        )
+        trace = self.get_trace(response)
+        spans = [item for item, _ in tracing._walk(trace.root)]
+        categories = {item.category for item in spans}
+        self.assertTrue(
+            {'middleware', 'view', 'sql', 'template', 'url'} <= categories
+        )
+        sql = [item for item in spans if item.category == 'sql']
+        self.assertTrue(any(
+            item.args['call_site'].startswith('posts')
+            for item in sql if item.args['call_site']
+        ))
+        self.assertTrue(any(item.args['template'] for item in sql))
+
+    def test_view_error_recorded_and_handled_by_django(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id + 1,))
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTemplateUsed(response, 'core/404.html')
+        view = next(
+            child for child in self.get_trace(response).root.children
+            if child.category == 'view'
+        )
+        self.assertEqual(view.name, 'view posts:post_detail')
+        self.assertEqual(view.args['error'], 'Http404')
+        self.assertIsNotNone(view.end)
+
+    @override_settings(TRACING_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('X-Trace-Id'))
+
+    def test_exports_for_staff_only(self):
+        trace = self.get_trace(self.client.get(reverse('posts:index')))
+        chrome = reverse('core:trace_chrome', args=(trace.id,))
+        self.assertEqual(self.client.get(chrome).status_code, 302)
+        self.client.force_login(self.staff)
+        events = self.client.get(chrome).json()['traceEvents']
+        self.assertEqual(events[0]['cat'], 'request')
+        folded = self.client.get(
+            reverse('core:trace_collapsed', args=(trace.id,))
+        ).content.decode()
+        self.assertIn('GET_/;middleware_request', folded)
+        response = self.client.get(reverse('core:trace_list'))
+        self.assertContains(response, trace.id)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.profiles_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profiles_dir)
+        settings = override_settings(PROFILES_DIR=self.profiles_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.user = User.objects.create_user(username='user')
+
+    def test_staff_token_profiles_request(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('posts:index'),
+            HTTP_X_PROFILE=profiling.make_token(self.staff),
+        )
+        profile_id = response['X-Profile-Id']
+        report = self.client.get(
+            reverse('core:profile_download', args=(profile_id, 'txt'))
+        )
+        content = b''.join(report.streaming_content).decode()
+        self.assertIn('GET /', content)
+        self.assertIn('Места выделения памяти', content)
+        list_page = self.client.get(reverse('core:profile_list'))
+        self.assertContains(list_page, profile_id)
+
+    def test_same_second_profiles_kept_apart(self):
+        self.client.force_login(self.staff)
+        token = profiling.make_token(self.staff)
+        with mock.patch('time.strftime', return_value='20260101-120000'):
+            ids = [
+                self.client.get(
+                    reverse('posts:index'),
+                    HTTP_X_PROFILE=token,
+                )['X-Profile-Id']
+                for _ in range(2)
+            ]
+        self.assertNotEqual(ids[0], ids[1])
+        for profile_id in ids:
+            self.assertIsNotNone(profiling.profile_path(profile_id, 'prof'))
+        self.assertEqual(len(os.listdir(self.profiles_dir)), 4)
+
+    def test_token_ignored_for_other_users(self):
+        token = profiling.make_token(self.staff)
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:index'),
+            {profiling.PARAM: token},
+        )
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertEqual(os.listdir(self.profiles_dir), [])
+
+    def test_download_rejects_foreign_paths(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse('core:profile_download', args=('x', 'py'))
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SLOW_QUERY_FLUSH_INTERVAL=3600)
+class SlowQueryTests(TestCase):
+    def setUp(self):
+        slowlog.flush()
+
+    def test_normalize_drops_literals(self):
+        self.assertEqual(
+            slowlog.normalize(
+                "SELECT * FROM t WHERE a = 'x''y' AND b IN (%s, %s)\n"
+                'LIMIT 21'
+            ),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?',
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_recorded_with_context(self):
+        author = User.objects.create_user(username='auth')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=author, group=group, text='Тест')
+        self.client.get(reverse('posts:profile', args=(author.username,)))
+        self.client.get(reverse('posts:group_list', args=(group.slug,)))
+        self.client.get(reverse('posts:group_list', args=(group.slug,)))
+        # Запросы только наполнили буфер, пишет его фоновый поток.
+        self.assertFalse(SlowQuery.objects.exists())
+        self.assertEqual(slowlog.flush(), 3)
+        samples = SlowQuerySample.objects.filter(
+            sql__contains='"posts_postcard"."excerpt_html"',
+        )
+        self.assertTrue(samples.exists())
+        sample = samples.first()
+        self.assertEqual(sample.view, 'posts:group_list')
+        self.assertIn('posts_postcard', sample.plan)
+        self.assertTrue(
+            SlowQuerySample.objects.filter(
+                template__startswith='posts/profile.html:',
+            ).exists()
+        )
+        self.assertGreaterEqual(sample.query.count, 2)
+        self.assertLess(
+            SlowQuery.objects.count(),
+            SlowQuerySample.objects.count(),
+        )
+
+    def test_repeat_updates_last_seen(self):
+        record = slowlog.capture('SELECT 1', (), False, 0.5)
+        slowlog.save([record], 'posts:index')
+        long_ago = timezone.now() - timedelta(days=1)
+        SlowQuery.objects.update(last_seen=long_ago)
+        slowlog.save([record], 'posts:index')
+        query = SlowQuery.objects.get()
+        self.assertEqual(query.count, 2)
+        self.assertGreater(query.last_seen, long_ago)
+
+    def test_percentile(self):
+        self.assertIsNone(metrics.percentile([], 50))
+        self.assertEqual(metrics.percentile([3, 1, 2, 4], 50), 3)
+        self.assertEqual(metrics.percentile([3, 1, 2, 4], 95), 4)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser('admin', 'a@test.ru', 'pass')
+        self.client.force_login(admin)
+        self.client.get(reverse('posts:index'))
+        slowlog.flush()
+        response = self.client.get(
+            reverse('admin:core_slowquery_changelist')
+        )
+        self.assertContains(response, 'p95')
+
+
+@override_settings(RATE_LIMITS={
+    'posts:profile_follow': {'user': '2/m', 'ip': '3/m'},
+    'posts:index': {'ip': '1/m', 'min_page': 3},
+    'posts:add_comment': {'ip': '1/m', 'methods': ['POST']},
+})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader_{i}') for i in range(2)
+        ]
+        cls.follow_url = reverse('posts:profile_follow', args=('author',))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills_over_time(self):
+        bucket = [('key', '2/m')]
+        self.assertEqual(ratelimit.take(bucket, now=0), 0)
+        self.assertEqual(ratelimit.take(bucket, now=0), 0)
+        self.assertEqual(ratelimit.take(bucket, now=0), 30)
+        self.assertEqual(ratelimit.take(bucket, now=15), 15)
+        self.assertEqual(ratelimit.take(bucket, now=30), 0)
+
+    def test_refused_request_spends_no_tokens(self):
+        ratelimit.take([('ip', '1/m')], now=0)
+        buckets = [('user', '1/m'), ('ip', '1/m')]
+        self.assertEqual(ratelimit.take(buckets, now=0), 60)
+        self.assertEqual(ratelimit.take([('user', '1/m')], now=0), 0)
+
+    def test_limits_per_user_then_per_ip(self):
+        self.client.force_login(self.readers[0])
+        statuses = [self.client.get(self.follow_url).status_code
+                    for _ in range(3)]
+        self.assertEqual(statuses, [302, 302, 429])
+        self.client.force_login(self.readers[1])
+        self.assertEqual(self.client.get(self.follow_url).status_code, 302)
+        response = self.client.get(self.follow_url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        self.assertTemplateUsed(response, 'core/429.html')
+        response = self.client.get(self.follow_url, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    def test_only_deep_pages_limited(self):
+        url = reverse('posts:index')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.get(url, {'page': 3})
+        response = self.client.get(url, {'page': 4})
+        self.assertEqual(response.status_code, 429)
+
+    def test_methods_filter(self):
+        post = Post.objects.create(author=self.author, text='пост')
+        self.client.force_login(self.readers[0])
+        url = reverse('posts:add_comment', args=(post.id,))
+        self.client.post(url, {'text': 'первый'})
+        self.assertEqual(self.client.get(url).status_code, 302)
+        response = self.client.post(url, {'text': 'второй'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(post.comments.count(), 1)
+
+
+@override_settings(
+    LOAD_SHED_MAX_IN_FLIGHT=None,
+    LOAD_SHED_LATENCY=None,
+    LOAD_SHED_ROUTES={'posts:index'},
+    LOAD_SHED_RETRY_AFTER=30,
+)
+class LoadSheddingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.url = reverse('posts:index')
+
+    def test_in_flight_and_latency_thresholds(self):
+        with override_settings(LOAD_SHED_MAX_IN_FLIGHT=0):
+            shedding.started()
+            self.assertTrue(shedding.overloaded())
+            shedding.finished(0)
+        self.assertFalse(shedding.overloaded())
+        with override_settings(LOAD_SHED_LATENCY=-1):
+            self.assertTrue(shedding.overloaded())
+
+    def test_overloaded_serves_stale_page_or_503(self):
+        Post.objects.create(author=self.user, text='старая копия')
+        self.client.get(self.url)
+        Post.objects.create(author=self.user, text='свежий пост')
+        with override_settings(LOAD_SHED_LATENCY=-1):
+            stale = self.client.get(self.url)
+            self.client.force_login(self.user)
+            refused = self.client.get(self.url)
+            follow = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(stale['X-Stale'], '1')
+        self.assertContains(stale, 'старая копия')
+        self.assertNotContains(stale, 'свежий пост')
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused['Retry-After'], '30')
+        self.assertEqual(follow.status_code, 200)
+
+    def test_copy_refreshed_once_per_interval(self):
+        request = RequestFactory().get(self.url)
+        request.user = AnonymousUser()
+        with override_settings(LOAD_SHED_REFRESH_INTERVAL=0):
+            shedding.remember(request, HttpResponse('первая'))
+            shedding.remember(request, HttpResponse('вторая'))
+        self.assertEqual(shedding.stale_page(request)[0], 'вторая'.encode())
+        shedding.remember(request, HttpResponse('третья'))
+        shedding.remember(request, HttpResponse('четвёртая'))
+        self.assertEqual(shedding.stale_page(request)[0], 'третья'.encode())
+
+    def test_copies_keyed_by_whitelisted_params(self):
+        Post.objects.create(author=self.user, text='пост')
+        self.client.get(self.url, {'page': 1, 'utm': 'mail'})
+        with override_settings(LOAD_SHED_LATENCY=-1):
+            self.assertEqual(
+                self.client.get(self.url, {'page': 1}).status_code,
+                503,
+            )
+            self.assertEqual(
+                self.client.get(self.url, {'page': 1, 'x': 1}).status_code,
+                503,
+            )
+        self.client.get(self.url, {'page': 1})
+        with override_settings(LOAD_SHED_LATENCY=-1):
+            stale = self.client.get(self.url, {'page': 1})
+        self.assertEqual(stale['X-Stale'], '1')
+
+
+@override_settings(
+    CACHE_STALE_GRACE=60,
+    CACHE_TTL_JITTER=0,
+    CACHE_EARLY_EXPIRATION_BETA=1.0,
+)
+class StaleWhileRevalidateTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def get(self, now, timeout=20):
+        with mock.patch('core.swr.time.time', return_value=now):
+            return swr.get_or_set('key', self.compute, timeout)
+
+    def test_fresh_value_reused(self):
+        self.assertEqual(self.get(1000), 1)
+        self.assertEqual(self.get(1010), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_lock_held(self):
+        self.get(1000)
+        cache.add('key:lock', 1)
+        self.assertEqual(self.get(1030), 1)
+        cache.delete('key:lock')
+        self.assertEqual(self.get(1030), 2)
+        self.assertIsNone(cache.get('key:lock'))
+
+    @override_settings(CACHE_MISS_WAIT=0)
+    def test_miss_computed_without_storing_while_lock_held(self):
+        cache.add('key:lock', 'чужой')
+        self.assertEqual(self.get(1000), 1)
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key:lock'), 'чужой')
+
+    def test_miss_waits_for_lock_holder(self):
+        cache.add('key:lock', 'чужой')
+
+        def sleep(seconds):
+            cache.set('key', ('готово', math.inf, 0))
+
+        with mock.patch('core.swr.time.sleep', side_effect=sleep):
+            self.assertEqual(self.get(1000), 'готово')
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_lock_of_another_request_kept(self):
+        self.get(1000)
+
+        def compute():
+            # Наш замок истёк, и его взял другой запрос.
+            cache.set('key:lock', 'чужой', None)
+            return 'новое'
+
+        with mock.patch('core.swr.time.time', return_value=1030):
+            self.assertEqual(swr.get_or_set('key', compute, 20), 'новое')
+        self.assertEqual(cache.get('key:lock'), 'чужой')
+
+    def test_early_expiration_favours_expensive_values(self):
+        # -log(1 - 0.9) ≈ 2.3: срок сдвигается на 2.3 времени пересчёта.
+        cache.set('key', ('cheap', time.time() + 1, 0.001))
+        with mock.patch('core.swr.random.random', return_value=0.9):
+            self.assertEqual(swr.get_or_set('key', self.compute, 20), 'cheap')
+        cache.set('key', ('costly', time.time() + 1, 2.0))
+        with mock.patch('core.swr.random.random', return_value=0.9):
+            self.assertEqual(swr.get_or_set('key', self.compute, 20), 1)
+
+    @override_settings(CACHE_TTL_JITTER=0.5)
+    def test_ttl_jitter_shortens_freshness(self):
+        with mock.patch('core.swr.random.uniform', return_value=0.5):
+            self.get(1000)
+        self.assertEqual(self.get(1009), 1)
+        self.assertEqual(self.get(1011), 2)
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load swr_cache %}'
+            '{% swrcache 20 fragment name %}{{ value }}{% endswrcache %}'
+        )
+
+        def render(value, name='a'):
+            return template.render(Context({'value': value, 'name': name}))
+
+        self.assertEqual(render('первый'), 'первый')
+        self.assertEqual(render('второй'), 'первый')
+        self.assertEqual(render('второй', name='b'), 'второй')
@@ -0,0 +1,34 @@
+import time
+
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as BaseKVStore
+
+from . import tracing
+from .metrics import CACHE_REQUESTS, THUMBNAIL_DURATION
+
+
+class KVStore(BaseKVStore):
+    """Хранилище sorl, которое считает попадания и промахи."""
+
+    def get(self, image_file):
+        value = super().get(image_file)
+        CACHE_REQUESTS.inc(
+            cache='thumbnail',
+            result='miss' if value is None else 'hit',
+        )
+        return value
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    def get_thumbnail(self, file_, geometry_string, **options):
+        start = time.perf_counter()
+        try:
+            with tracing.span(f'thumbnail {geometry_string}', 'thumbnail',
+                              file=file_):
+                return super().get_thumbnail(
+                    file_,
+                    geometry_string,
+                    **options
+                )
+        finally:
+            THUMBNAIL_DURATION.observe(time.perf_counter() - start)
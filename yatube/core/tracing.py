@@ -0,0 +1,201 @@
+"""Трассировка запросов: дерево интервалов и выгрузка для flame graph.
+
+Доля `TRACING_SAMPLE_RATE` запросов записывается целиком: middleware,
+вьюха, каждый SQL-запрос с местом вызова, каждый шаблон и include,
+`{% url %}` и миниатюры. `TRACING_KEEP_SLOWEST` самых медленных трасс
+процесса хранятся в памяти и выгружаются в формате Chrome trace
+(chrome://tracing, Perfetto, speedscope) или в свёрнутых стеках для
+flamegraph.pl.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_local = threading.local()
+_slowest = []
+_lock = threading.Lock()
+_sequence = itertools.count()
+
+_SKIP_FRAMES = (
+    os.sep + 'site-packages' + os.sep,
+    os.path.join('core', 'tracing.py'),
+    os.path.join('core', 'middleware.py'),
+    os.path.join('core', 'slowlog.py'),
+)
+
+
+class Span:
+    def __init__(self, name, category, args=None):
+        self.name = name
+        self.category = category
+        self.args = args or {}
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+
+class Trace:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex[:12]
+        self.created = time.time()
+        self.root = Span(name, 'request')
+        self.stack = [self.root]
+
+    @property
+    def duration(self):
+        return self.root.duration
+
+    def current_template(self):
+        for span in reversed(self.stack):
+            if span.category == 'template':
+                return span.name
+        return None
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def start_trace(name):
+    _local.trace = Trace(name)
+    return _local.trace
+
+
+def finish_trace():
+    trace = current_trace()
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.root.end = time.perf_counter()
+    _group_middleware(trace)
+    with _lock:
+        heapq.heappush(_slowest, (trace.duration, next(_sequence), trace))
+        while len(_slowest) > settings.TRACING_KEEP_SLOWEST:
+            heapq.heappop(_slowest)
+    return trace
+
+
+def _group_middleware(trace):
+    """Раскладывает время вне вьюхи на фазы middleware до и после неё."""
+    root = trace.root
+    view = next(
+        (child for child in root.children if child.category == 'view'),
+        None,
+    )
+    if view is None:
+        return
+    before = Span('middleware request', 'middleware')
+    after = Span('middleware response', 'middleware')
+    before.start, before.end = root.start, view.start
+    after.start, after.end = view.end, root.end
+    before.children = [c for c in root.children if c.end <= view.start]
+    after.children = [c for c in root.children if c.start >= view.end]
+    root.children = [before, view, after]
+
+
+def open_span(name, category, **args):
+    trace = current_trace()
+    if trace is None:
+        return None
+    span = Span(name, category, args)
+    trace.stack[-1].children.append(span)
+    trace.stack.append(span)
+    return span
+
+
+def close_span(span):
+    trace = current_trace()
+    if span is None or trace is None:
+        return
+    span.end = time.perf_counter()
+    if span in trace.stack:
+        del trace.stack[trace.stack.index(span):]
+
+
+@contextmanager
+def span(name, category, **args):
+    opened = open_span(name, category, **args)
+    try:
+        yield opened
+    finally:
+        close_span(opened)
+
+
+def call_site():
+    """Ближайший кадр кода проекта, вызвавший запрос."""
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if not frame.filename.startswith(settings.BASE_DIR):
+            continue
+        if any(part in frame.filename for part in _SKIP_FRAMES):
+            continue
+        path = os.path.relpath(frame.filename, settings.BASE_DIR)
+        return f'{path}:{frame.lineno} {frame.name}'
+    return None
+
+
+def template_span(template):
+    return span(template.origin.template_name or 'string', 'template')
+
+
+def url_span(node):
+    return span(f'url {node.view_name.token}', 'url')
+
+
+def slowest():
+    with _lock:
+        return [trace for _, _, trace in sorted(_slowest, reverse=True)]
+
+
+def get_trace(trace_id):
+    for trace in slowest():
+        if trace.id == trace_id:
+            return trace
+    return None
+
+
+def _walk(span, parents=()):
+    yield span, parents
+    for child in span.children:
+        yield from _walk(child, parents + (span,))
+
+
+def to_chrome_trace(trace):
+    """Формат Trace Event: события `X` с микросекундами от начала."""
+    origin = trace.root.start
+    events = []
+    for item, _ in _walk(trace.root):
+        events.append({
+            'name': item.name,
+            'cat': item.category,
+            'ph': 'X',
+            'ts': round((item.start - origin) * 1e6, 1),
+            'dur': round(item.duration * 1e6, 1),
+            'pid': 1,
+            'tid': 1,
+            'args': {key: str(value) for key, value in item.args.items()},
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def to_collapsed(trace):
+    """Свёрнутые стеки: путь через `;` и собственное время в мкс."""
+    lines = []
+    for item, parents in _walk(trace.root):
+        own = item.duration - sum(child.duration for child in item.children)
+        path = ';'.join(
+            part.name.replace(';', ',').replace(' ', '_')
+            for part in parents + (item,)
+        )
+        lines.append(f'{path} {max(int(own * 1e6), 0)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,25 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('traces/', views.trace_list, name='trace_list'),
+    path(
+        'traces/<str:trace_id>.json',
+        views.trace_chrome,
+        name='trace_chrome',
+    ),
+    path(
+        'traces/<str:trace_id>.folded',
+        views.trace_collapsed,
+        name='trace_collapsed',
+    ),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path(
+        'profiles/<str:profile_id>.<str:extension>',
+        views.profile_download,
+        name='profile_download',
+    ),
+]
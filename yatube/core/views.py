@@ -1,4 +1,13 @@
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import metrics, profiling, tracing
 
 
 def page_not_found(request, exception):
@@ -15,3 +24,76 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not request.user.is_staff and not (
+        token and constant_time_compare(header, f'Bearer {token}')
+    ):
+        raise PermissionDenied
+    metrics.dump(force=True)
+    return HttpResponse(
+        metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+@staff_member_required
+def trace_list(request):
+    return render(request, 'core/traces.html', {
+        'traces': tracing.slowest(),
+        'sample_rate': settings.TRACING_SAMPLE_RATE,
+    })
+
+
+def _get_trace_or_404(trace_id):
+    trace = tracing.get_trace(trace_id)
+    if trace is None:
+        raise Http404('Трасса вытеснена или записана другим процессом')
+    return trace
+
+
+@staff_member_required
+def trace_chrome(request, trace_id):
+    trace = _get_trace_or_404(trace_id)
+    response = JsonResponse(tracing.to_chrome_trace(trace))
+    response['Content-Disposition'] = (
+        f'attachment; filename="trace-{trace.id}.json"'
+    )
+    return response
+
+
+@staff_member_required
+def trace_collapsed(request, trace_id):
+    trace = _get_trace_or_404(trace_id)
+    response = HttpResponse(
+        tracing.to_collapsed(trace),
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="trace-{trace.id}.folded"'
+    )
+    return response
+
+
+@staff_member_required
+def profile_list(request):
+    return render(request, 'core/profiles.html', {
+        'profiles': profiling.list_profiles(),
+        'token': profiling.make_token(request.user),
+        'param': profiling.PARAM,
+    })
+
+
+@staff_member_required
+def profile_download(request, profile_id, extension):
+    path = profiling.profile_path(profile_id, extension)
+    if path is None:
+        raise Http404('Профиль не найден')
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=os.path.basename(path),
+    )
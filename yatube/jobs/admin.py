@@ -0,0 +1,38 @@
+from django.contrib import admin
+
+from .models import Job
+from .queue import stats
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'started',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
+    readonly_fields = ('created', 'started', 'heartbeat', 'finished', 'error')
+    actions = ('retry',)
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['queue_stats'] = stats()
+        return super().changelist_view(request, extra_context)
+
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED,
+            attempts=0,
+        )
+        self.message_user(request, f'Возвращено в очередь: {updated}')
+
+    retry.short_description = 'Повторить'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,111 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs import process
+from jobs.queue import claim, finish, release, renew, requeue_stale
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS_PROCESSES,
+        )
+        parser.add_argument(
+            '--poll',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, секунды',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def _pool(self, processes):
+        return ProcessPoolExecutor(
+            processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=process.init,
+        )
+
+    def _submit(self, pool, job_ids, running):
+        """Передаёт задачи пулу; False, если пул оказался сломан."""
+        for index, job_id in enumerate(job_ids):
+            try:
+                future = pool.submit(process.run, job_id)
+            except BrokenProcessPool:
+                release(job_ids[index:])
+                return False
+            running[future] = job_id
+        return True
+
+    def _finish(self, done, running):
+        """Записывает результаты; False, если пул оказался сломан."""
+        healthy = True
+        for future in done:
+            job_id = running.pop(future)
+            try:
+                error = future.result()
+            except BrokenProcessPool as exc:
+                # Какая из задач убила процесс, неизвестно: все получают
+                # попытку с ошибкой, и задача, роняющая пул каждый раз,
+                # исчерпает `max_attempts`.
+                healthy = False
+                error = repr(exc)
+            except Exception as exc:
+                error = repr(exc)
+            instance = finish(job_id, error)
+            self.stdout.write(f'{instance}: {instance.status}')
+        return healthy
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        interval = settings.JOBS_REQUEUE_INTERVAL
+        renewed_at = None
+        pool = self._pool(processes)
+        running = {}
+        healthy = True
+        try:
+            while True:
+                close_old_connections()
+                if not healthy:
+                    # Дочерний процесс умер (OOM, сбой в C-расширении), и
+                    # пул больше не принимает задачи.
+                    self.stderr.write('Пул процессов сломан, пересоздаю')
+                    pool.shutdown(wait=False)
+                    pool = self._pool(processes)
+                    healthy = True
+                now = time.monotonic()
+                if renewed_at is None or now - renewed_at >= interval:
+                    renew(list(running.values()))
+                    requeue_stale()
+                    renewed_at = now
+                free = processes - len(running)
+                if free:
+                    healthy = self._submit(pool, claim(free), running)
+                if not running:
+                    if not healthy:
+                        continue
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                done, _ = wait(
+                    running,
+                    timeout=options['poll'],
+                    return_when=FIRST_COMPLETED,
+                )
+                healthy = self._finish(done, running) and healthy
+        finally:
+            pool.shutdown()
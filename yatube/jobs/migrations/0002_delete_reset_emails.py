@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def delete_reset_emails(apps, schema_editor):
+    # Аргументы этих задач — готовые письма со ссылками сброса пароля.
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(name='users.tasks.send_email').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_reset_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:01
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_leases(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Job.objects.filter(status='running').update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_delete_reset_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, help_text='Воркер продлевает аренду, пока выполняет задачу', null=True, verbose_name='Аренда продлена'),
+        ),
+        migrations.RunPython(start_leases, migrations.RunPython.noop),
+    ]
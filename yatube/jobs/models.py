@@ -0,0 +1,69 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField('Функция', max_length=200)
+    args = models.TextField('Аргументы', default='[]')
+    kwargs = models.TextField('Именованные аргументы', default='{}')
+    priority = models.IntegerField(
+        'Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше',
+    )
+    dedup_key = models.CharField(
+        'Ключ дедупликации',
+        max_length=200,
+        blank=True,
+        null=True,
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+    )
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        'Аренда продлена',
+        null=True,
+        blank=True,
+        help_text='Воркер продлевает аренду, пока выполняет задачу',
+    )
+    finished = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='jobs_job_claim_idx',
+            ),
+        ]
+        constraints = [
+            # Пока задача ждёт или выполняется, вторую с тем же ключом
+            # поставить нельзя.
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=Q(status__in=['queued', 'running']),
+                name='jobs_job_active_dedup_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,20 @@
+"""Точки входа дочерних процессов воркера.
+
+Процессы запускаются через spawn и импортируют этот модуль до
+`django.setup()`, поэтому модели подключаются только внутри функций.
+"""
+import django
+
+
+def init():
+    django.setup()
+
+
+def run(job_id):
+    from django.db import connections
+
+    from .queue import execute
+    try:
+        return execute(job_id)
+    finally:
+        connections.close_all()
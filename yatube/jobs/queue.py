@@ -0,0 +1,170 @@
+"""Очередь фоновых задач в базе, без внешнего брокера.
+
+Задача — обычная функция уровня модуля, помеченная `@job`. Её ставят в
+очередь через `enqueue()`, а выполняет `manage.py worker` в пуле
+процессов. Аргументы сохраняются в JSON, поэтому передавать нужно
+ключи объектов, а не сами объекты.
+"""
+import json
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.metrics import percentile
+
+from .models import Job
+
+
+def job(func):
+    """Помечает функцию как фоновую задачу."""
+    func.job_name = f'{func.__module__}.{func.__qualname__}'
+    return func
+
+
+def enqueue(func, args=(), kwargs=None, priority=0, dedup_key=None,
+            run_at=None, delay=None, max_attempts=None):
+    """Ставит задачу в очередь.
+
+    Если задача с тем же `dedup_key` ещё ждёт или выполняется, новая не
+    создаётся и возвращается существующая.
+    """
+    if run_at is None:
+        run_at = timezone.now()
+    if delay is not None:
+        run_at += timedelta(seconds=delay)
+    instance = Job(
+        name=func.job_name,
+        args=json.dumps(list(args)),
+        kwargs=json.dumps(kwargs or {}),
+        priority=priority,
+        dedup_key=dedup_key,
+        run_at=run_at,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_EAGER:
+        instance.status = Job.DONE
+        instance.started = instance.finished = timezone.now()
+        func(*args, **(kwargs or {}))
+        instance.save()
+        return instance
+    try:
+        with transaction.atomic():
+            instance.save()
+    except IntegrityError:
+        if dedup_key is None:
+            raise
+        return Job.objects.filter(
+            dedup_key=dedup_key,
+            status__in=[Job.QUEUED, Job.RUNNING],
+        ).first()
+    return instance
+
+
+def claim(limit):
+    """Забирает до `limit` готовых к запуску задач.
+
+    Задачи помечаются `running` условным UPDATE, поэтому несколько
+    воркеров не возьмут одну и ту же задачу дважды.
+    """
+    now = timezone.now()
+    ids = list(
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in ids:
+        updated = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            started=now,
+            heartbeat=now,
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def renew(job_ids):
+    """Продлевает аренду задач, которые воркер ещё выполняет."""
+    return Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(
+        heartbeat=timezone.now(),
+    )
+
+
+def release(job_ids):
+    """Возвращает в очередь взятые, но так и не запущенные задачи."""
+    return Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(
+        status=Job.QUEUED,
+    )
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, брошенные упавшим воркером: их
+    аренду никто не продлевал дольше `JOBS_LEASE` секунд."""
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_LEASE)
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat__lt=stale,
+    ).update(status=Job.QUEUED)
+
+
+def execute(job_id):
+    """Выполняет задачу; возвращает текст ошибки или None."""
+    instance = Job.objects.get(id=job_id)
+    try:
+        func = import_string(instance.name)
+        func(*json.loads(instance.args), **json.loads(instance.kwargs))
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def finish(job_id, error=None):
+    """Записывает результат: готово, повтор с задержкой или ошибка."""
+    instance = Job.objects.get(id=job_id)
+    instance.attempts += 1
+    instance.finished = timezone.now()
+    if error is None:
+        instance.status = Job.DONE
+        instance.error = ''
+    elif instance.attempts < instance.max_attempts:
+        backoff = settings.JOBS_RETRY_BACKOFF * 2 ** (instance.attempts - 1)
+        backoff *= random.uniform(1, 1.5)
+        instance.status = Job.QUEUED
+        instance.run_at = instance.finished + timedelta(seconds=backoff)
+        instance.error = error
+    else:
+        instance.status = Job.FAILED
+        instance.error = error
+    instance.save()
+    return instance
+
+
+def stats(window=timedelta(hours=1)):
+    """Глубина очереди и задержки задач за последнее окно."""
+    now = timezone.now()
+    depth = dict.fromkeys((status for status, _ in Job.STATUS_CHOICES), 0)
+    rows = Job.objects.order_by().values('status').annotate(count=Count('id'))
+    for row in rows:
+        depth[row['status']] = row['count']
+    finished = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED],
+        finished__gte=now - window,
+    ).values_list('run_at', 'started', 'finished')[:1000]
+    waits = [(started - run_at).total_seconds()
+             for run_at, started, _ in finished]
+    runs = [(done - started).total_seconds()
+            for _, started, done in finished]
+    return {
+        'depth': depth,
+        'due': Job.objects.filter(status=Job.QUEUED, run_at__lte=now).count(),
+        'wait_p50': percentile(waits, 50),
+        'wait_p95': percentile(waits, 95),
+        'run_p50': percentile(runs, 50),
+        'run_p95': percentile(runs, 95),
+    }
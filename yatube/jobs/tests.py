@@ -0,0 +1,130 @@
+import json
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+from .queue import (
+    claim, enqueue, execute, finish, job, release, renew, requeue_stale,
+    stats,
+)
+
+User = get_user_model()
+
+CALLS = []
+
+
+@job
+def remember(value):
+    CALLS.append(value)
+
+
+@job
+def explode():
+    raise ValueError('boom')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_dedup_key_returns_active_job(self):
+        first = enqueue(remember, args=(1,), dedup_key='same')
+        second = enqueue(remember, args=(2,), dedup_key='same')
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Job.objects.count(), 1)
+        Job.objects.filter(id=first.id).update(status=Job.DONE)
+        third = enqueue(remember, args=(3,), dedup_key='same')
+        self.assertNotEqual(third.id, first.id)
+
+    def test_claim_respects_priority_and_schedule(self):
+        low = enqueue(remember, args=('low',))
+        high = enqueue(remember, args=('high',), priority=5)
+        enqueue(remember, args=('later',), delay=60)
+        self.assertEqual(claim(10), [high.id, low.id])
+        self.assertEqual(claim(10), [])
+
+    def test_execute_and_finish(self):
+        instance = enqueue(remember, args=('value',))
+        claim(1)
+        self.assertIsNone(execute(instance.id))
+        self.assertEqual(CALLS, ['value'])
+        self.assertEqual(finish(instance.id).status, Job.DONE)
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_failed_job_retried_with_backoff(self):
+        instance = enqueue(explode, max_attempts=2)
+        claim(1)
+        error = execute(instance.id)
+        self.assertIn('boom', error)
+        instance = finish(instance.id, error)
+        self.assertEqual(instance.status, Job.QUEUED)
+        self.assertGreaterEqual(
+            instance.run_at,
+            timezone.now() + timedelta(seconds=9),
+        )
+        instance = finish(instance.id, error)
+        self.assertEqual(instance.status, Job.FAILED)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        enqueue(remember, args=('now',))
+        self.assertEqual(CALLS, ['now'])
+
+    def test_renewed_jobs_not_requeued(self):
+        abandoned = enqueue(remember, args=(1,))
+        long_running = enqueue(remember, args=(2,))
+        fresh = enqueue(remember, args=(3,))
+        claim(3)
+        Job.objects.filter(id__in=[abandoned.id, long_running.id]).update(
+            started=timezone.now() - timedelta(hours=1),
+            heartbeat=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(renew([long_running.id]), 1)
+        self.assertEqual(requeue_stale(), 1)
+        statuses = dict(Job.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[abandoned.id], Job.QUEUED)
+        self.assertEqual(statuses[long_running.id], Job.RUNNING)
+        self.assertEqual(statuses[fresh.id], Job.RUNNING)
+
+    def test_release_returns_claimed_jobs(self):
+        instance = enqueue(remember, args=(1,))
+        claim(1)
+        self.assertEqual(release([instance.id]), 1)
+        instance.refresh_from_db()
+        self.assertEqual(instance.status, Job.QUEUED)
+        self.assertEqual(instance.attempts, 0)
+
+    def test_stats(self):
+        enqueue(remember, args=(1,))
+        self.assertEqual(stats()['depth'][Job.QUEUED], 1)
+        self.assertEqual(stats()['due'], 1)
+
+
+class PasswordResetTests(TestCase):
+    def test_reset_email_is_queued(self):
+        user = User.objects.create_user(
+            username='auth',
+            email='auth@test.ru',
+            password='test-password',
+        )
+        self.client.post(
+            reverse('users:password_reset'),
+            data={'email': 'auth@test.ru'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        instance = Job.objects.get(name='users.tasks.send_password_reset')
+        self.assertEqual(
+            json.loads(instance.args),
+            [user.pk, 'auth@test.ru', 'testserver', False],
+        )
+        self.assertIsNone(execute(instance.id))
+        self.assertEqual(mail.outbox[0].to, ['auth@test.ru'])
+        link = re.search(r'/auth/reset/\S+', mail.outbox[0].body).group()
+        response = self.client.get(link, follow=True)
+        self.assertTrue(response.context['validlink'])
@@ -1,6 +1,19 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Group, Post, PurgeTask
+from .purge import schedule_purge
+
+
+def purge_in_background(modeladmin, request, queryset):
+    for instance in queryset:
+        schedule_purge(instance)
+    modeladmin.message_user(
+        request,
+        f'Поставлено в очередь на удаление: {len(queryset)}'
+    )
+
+
+purge_in_background.short_description = 'Удалить в фоне'
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -14,7 +27,9 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    autocomplete_fields = ('group',)
     empty_value_display = '-пусто-'
+    actions = (purge_in_background,)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -23,9 +38,26 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
-    search_fields = ('description',)
+    search_fields = ('^title', 'description')
     list_filter = ('title',)
+    actions = (purge_in_background,)
+
+
+class PurgeTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'status',
+        'processed',
+        'total',
+        'created',
+        'updated',
+    )
+    list_filter = ('status', 'kind')
+    readonly_fields = ('kind', 'object_id', 'total', 'processed', 'error')
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(PurgeTask, PurgeTaskAdmin)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        # Модули подключают сигналы.
+        from . import cards, follows, group_stats, registry  # noqa: F401
@@ -0,0 +1,79 @@
+"""Архивный слой для старых постов.
+
+Почти все чтения приходятся на последние недели, поэтому посты старше
+`POSTS_ARCHIVE_AFTER_DAYS` вместе с комментариями переносятся пачками в
+`ArchivedPost` и `ArchivedComment`. Ленты читают карточки
+(posts/cards.py), которые есть и у архивных постов, так что им
+неважно, в какой таблице лежит пост.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.http import Http404
+from django.utils import timezone
+
+from . import cards, group_stats, rendering
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+
+def _copy(instance, model):
+    names = {field.attname for field in model._meta.concrete_fields}
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname not in names:
+            continue
+        value = getattr(instance, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name
+        values[field.attname] = value
+    return model(**values)
+
+
+def archive_posts(older_than=None, batch_size=None):
+    """Переносит старые посты в архив, возвращает их количество."""
+    if older_than is None:
+        older_than = timedelta(days=settings.POSTS_ARCHIVE_AFTER_DAYS)
+    if batch_size is None:
+        batch_size = settings.POSTS_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - older_than
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Post.objects.filter(pub_date__lt=cutoff)
+                .order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            ids = [post.id for post in batch]
+            ArchivedPost.objects.bulk_create(
+                [_copy(post, ArchivedPost) for post in batch]
+            )
+            ArchivedComment.objects.bulk_create([
+                _copy(comment, ArchivedComment)
+                for comment in Comment.objects.filter(post_id__in=ids)
+            ])
+            Post.objects.filter(id__in=ids).delete()
+            cards.rebuild(ArchivedPost, ids)
+            # Удаление из горячей таблицы вычло посты из групп.
+            group_stats.recount(post.group_id for post in batch)
+        moved += len(batch)
+    return moved
+
+
+def get_post_or_404(post_id, bounded=False):
+    """Ищет пост в горячей таблице, затем в архиве.
+
+    С `bounded=True` слишком длинный текст не загружается, см.
+    `rendering.bound_text()`.
+    """
+    for model in (Post, ArchivedPost):
+        queryset = model.objects.filter(id=post_id)
+        if bounded:
+            queryset = rendering.bound_text(queryset)
+        post = queryset.first()
+        if post is not None:
+            return rendering.unpack_text(post) if bounded else post
+    raise Http404('Пост не найден')
@@ -0,0 +1,71 @@
+"""Подсказки групп по началу названия.
+
+Ответы кэшируются по нормализованному префиксу и версии реестра групп,
+так что переименование или удаление группы сбрасывает их сразу.
+"""
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse_lazy
+from django.utils.html import format_html
+
+from core.search import normalize, prefix_filter, prefix_key
+
+from . import registry
+from .models import Group
+
+TITLE_LENGTH = Group._meta.get_field('title_normalized').max_length
+
+
+def search_groups(query, limit=None):
+    """До `limit` групп, название которых начинается с `query`."""
+    prefix = normalize(query)
+    # Префикс длиннее названия ни с чем не совпадёт.
+    if not prefix or len(prefix) > TITLE_LENGTH:
+        return []
+    limit = limit or settings.GROUP_AUTOCOMPLETE_LIMIT
+    key = prefix_key('groups:autocomplete', registry.version(), limit, prefix)
+    results = cache.get(key)
+    if results is None:
+        results = list(
+            Group.objects.filter(prefix_filter('title_normalized', prefix))
+            .order_by('title_normalized', 'id')
+            .values('id', 'title', 'slug')[:limit]
+        )
+        cache.set(key, results, settings.GROUP_AUTOCOMPLETE_CACHE_TIMEOUT)
+    return results
+
+
+class GroupAutocomplete(forms.Widget):
+    """Поле поиска группы вместо `<select>` со всеми группами.
+
+    В форму уходит скрытое поле с id группы; подсказки подгружает
+    static/js/group_autocomplete.js.
+    """
+
+    url = reverse_lazy('posts:group_autocomplete')
+
+    class Media:
+        js = ('js/group_autocomplete.js',)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        input_id = attrs.pop('id', f'id_{name}')
+        try:
+            group = registry.get(int(value))
+        except (TypeError, ValueError):
+            group = None
+        return format_html(
+            '<input type="hidden" name="{name}" id="{id}_value" '
+            'value="{value}">'
+            '<input type="search" id="{id}" list="{id}_list" '
+            'value="{title}" autocomplete="off" '
+            'data-group-autocomplete="{url}" data-target="{id}_value"{attrs}>'
+            '<datalist id="{id}_list"></datalist>',
+            name=name,
+            id=input_id,
+            value=group.pk if group else '',
+            title=group.title if group else '',
+            url=self.url,
+            attrs=forms.utils.flatatt(attrs),
+        )
@@ -0,0 +1,287 @@
+"""Поддержка таблицы `PostCard` — готовых карточек постов для лент.
+
+Карточка копирует из `Post` (или `ArchivedPost`), `User` и `Group` всё,
+что выводит лента, и хранит число комментариев и адрес миниатюры.
+Обновления приходят из сигналов сохранения и удаления этих моделей и из
+`PostQuerySet.bulk_create()`/`update()`. Пути, которые обходят и то и
+другое (`archive_posts`, `schedule_purge`, миниатюры), синхронизируют
+карточки явно; `manage.py rebuild_cards` досоздаёт пропущенные.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import caches
+
+from .models import ArchivedPost, Comment, Group, Post, PostCard
+from .rendering import render_excerpt
+
+User = get_user_model()
+
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+# Версия состава карточек: от неё зависят закэшированные счётчики лент.
+COUNTS = 'post_card:counts'
+
+
+def _author_key(user_id):
+    return f'post_card:author:{user_id}'
+
+
+def author_versions(user_ids):
+    """Версии имён авторов {id: версия} для ключей HTML-карточек."""
+    versions = cache.get_many([_author_key(user_id) for user_id in user_ids])
+    return {
+        user_id: versions.get(_author_key(user_id), '')
+        for user_id in user_ids
+    }
+
+
+def card_values(post, archived, comment_count, thumbnail_url=''):
+    """Поля карточки для поста с загруженными автором и группой."""
+    group = post.group
+    return {
+        'post_id': post.id,
+        'is_archived': archived,
+        'excerpt_html': post.excerpt_html or render_excerpt(post.text),
+        'text_length': len(post.text),
+        'pub_date': post.pub_date,
+        'updated_at': post.updated_at,
+        'author_id': post.author_id,
+        'author_username': post.author.username,
+        'author_first_name': post.author.first_name,
+        'author_last_name': post.author.last_name,
+        'group_id': post.group_id,
+        'group_slug': group.slug if group else '',
+        'group_title': group.title if group else '',
+        'image': post.image.name or '',
+        'thumbnail_url': thumbnail_url,
+        'comment_count': comment_count,
+    }
+
+
+def _rebuild_chunk(model, ids):
+    archived = model is ArchivedPost
+    posts = list(
+        model.objects.filter(id__in=ids)
+        .select_related('author', 'group')
+        .annotate(
+            visible_comments=Count(
+                'comments',
+                filter=Q(comments__is_deleted=False),
+            )
+        )
+    )
+    found = {post.id for post in posts}
+    # Миниатюра остаётся, пока у поста та же картинка.
+    thumbnails = dict(
+        PostCard.objects.filter(post_id__in=found)
+        .exclude(thumbnail_url='')
+        .values_list('post_id', 'thumbnail_url')
+    )
+    cards = []
+    for post in posts:
+        thumbnail_url = ''
+        if post.image:
+            thumbnail_url = thumbnails.get(post.id, '')
+        cards.append(PostCard(**card_values(
+            post,
+            archived,
+            post.visible_comments,
+            thumbnail_url,
+        )))
+    with transaction.atomic():
+        # Архивная карточка заменяет горячую с тем же id, а пропавшие
+        # и скрытые посты теряют только карточку своей таблицы.
+        PostCard.objects.filter(
+            Q(post_id__in=found)
+            | Q(post_id__in=set(ids) - found, is_archived=archived)
+        ).delete()
+        PostCard.objects.bulk_create(cards)
+    caches.invalidate_on_commit(COUNTS)
+
+
+def rebuild(model, ids):
+    """Пересобирает карточки постов `model` с данными id."""
+    ids = list(ids)
+    batch_size = settings.POST_CARDS_BATCH_SIZE
+    for start in range(0, len(ids), batch_size):
+        _rebuild_chunk(model, ids[start:start + batch_size])
+
+
+def rebuild_missing(model, batch_size=None):
+    """Создаёт карточки видимых постов `model`, у которых их нет."""
+    batch_size = batch_size or settings.POST_CARDS_BATCH_SIZE
+    archived = model is ArchivedPost
+    created = 0
+    while True:
+        ids = list(
+            model.objects.exclude(
+                id__in=PostCard.objects.filter(is_archived=archived)
+                .values('post_id')
+            ).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return created
+        _rebuild_chunk(model, ids)
+        created += len(ids)
+
+
+def set_thumbnail(post_id, url):
+    PostCard.objects.filter(post_id=post_id).update(thumbnail_url=url)
+
+
+def forget(model, ids):
+    """Удаляет карточки постов `model`; `ids` может быть подзапросом."""
+    PostCard.objects.filter(
+        post_id__in=ids,
+        is_archived=model is ArchivedPost,
+    ).delete()
+    caches.invalidate_on_commit(COUNTS)
+
+
+def forget_author(user_id):
+    PostCard.objects.filter(author_id=user_id).delete()
+    caches.invalidate_on_commit(COUNTS)
+
+
+def forget_group(group_id):
+    PostCard.objects.filter(group_id=group_id).update(
+        group_id=None,
+        group_slug='',
+        group_title='',
+    )
+    caches.invalidate_on_commit(COUNTS)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=ArchivedPost)
+def post_saved(sender, instance, **kwargs):
+    rebuild(sender, [instance.id])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def post_deleted(sender, instance, **kwargs):
+    PostCard.objects.filter(
+        post_id=instance.id,
+        is_archived=sender is ArchivedPost,
+    ).delete()
+    caches.invalidate_on_commit(COUNTS)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        PostCard.objects.filter(
+            post_id=instance.post_id,
+            is_archived=False,
+        ).update(comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if not instance.is_deleted:
+        PostCard.objects.filter(
+            post_id=instance.post_id,
+            is_archived=False,
+        ).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not NAME_FIELDS & set(update_fields):
+        return
+    PostCard.objects.filter(author_id=instance.id).update(
+        author_username=instance.username,
+        author_first_name=instance.first_name,
+        author_last_name=instance.last_name,
+    )
+    # Готовый HTML карточек выводит имя автора и ссылку на профиль.
+    # Версия меняется сразу и ещё раз после коммита — для процессов,
+    # успевших отрендерить карточку со старым именем до коммита.
+
+    def bump():
+        cache.set(_author_key(instance.id), uuid.uuid4().hex, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    PostCard.objects.filter(group_id=instance.id).update(
+        group_slug=instance.slug,
+        group_title=instance.title,
+    )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_group(instance.id)
+
+
+class Cards:
+    """Срез карточек, который читается из базы при первом обращении —
+    страница, закрытая кэшем шаблона, не делает запроса."""
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self._posts = None
+
+    def _load(self):
+        if self._posts is None:
+            self._posts = [card.as_post() for card in self.queryset]
+        return self._posts
+
+    def __len__(self):
+        return len(self._load())
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
+
+
+class CardFeed:
+    """Последовательность для Paginator: карточки, отданные как посты.
+
+    Полного текста в карточках нет — лента выводит отрывок и ссылку на
+    пост. С `key` число карточек кэшируется до следующего изменения их
+    состава, и страницы ленты не делают COUNT(*) по всей выборке.
+    """
+
+    def __init__(self, queryset, key=None):
+        self.queryset = queryset
+        self.key = key
+        self._count = None
+
+    def _load_count(self):
+        if self.key is None:
+            return self.queryset.count()
+        cache_key = caches.versioned_key(COUNTS, self.key)
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(cache_key, count, None)
+        return count
+
+    def count(self):
+        if self._count is None:
+            self._count = self._load_count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self.queryset[index].as_post()
+        return Cards(self.queryset[index])
@@ -0,0 +1,48 @@
+"""Комментарии поста страницами по курсору.
+
+Страница — это `COMMENTS_PER_PAGE` комментариев после пары
+`(created, id)` последнего показанного, поэтому выборка идёт по индексу
+без OFFSET, а новые комментарии не сдвигают уже выданные страницы.
+Курсор подписан: подделать его, чтобы прочитать не тот срез, нельзя.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+SALT = 'posts.comments'
+
+
+def make_cursor(comment):
+    return signing.dumps([comment.created.isoformat(), comment.id], salt=SALT)
+
+
+def read_cursor(token):
+    try:
+        created, comment_id = signing.loads(token, salt=SALT)
+        created = parse_datetime(created)
+    except (signing.BadSignature, TypeError, ValueError):
+        created = None
+    if created is None:
+        raise Http404('Неверный курсор комментариев')
+    return created, comment_id
+
+
+def get_page(post, cursor=None):
+    """Комментарии страницы и курсор следующей (None — страниц больше нет).
+
+    Авторы не загружаются — их проставляет `loaders.attach()`.
+    """
+    limit = settings.COMMENTS_PER_PAGE
+    queryset = post.comments.order_by('created', 'id')
+    if cursor:
+        created, comment_id = read_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, id__gt=comment_id)
+        )
+    comments = list(queryset[:limit + 1])
+    if len(comments) <= limit:
+        return comments, None
+    comments = comments[:limit]
+    return comments, make_cursor(comments[-1])
@@ -0,0 +1,132 @@
+"""Подписки пользователя в кэше: отсортированный массив id авторов.
+
+Массив `array('I')` занимает четыре байта на подписку; проверка
+подписки — двоичный поиск, лента подписок берёт id авторов прямо из
+него. Сигналы `Follow` не правят закэшированный массив на месте —
+чтение, вставка и запись в кэш не атомарны, и одновременные изменения
+затёрли бы друг друга, — а удаляют его сразу и ещё раз после коммита:
+между ними другой запрос мог прочитать из базы старый набор и положить
+его в кэш. Следующее обращение перечитывает массив из базы. Те же
+сигналы ведут счётчики подписчиков и подписок в `users.Profile`.
+
+Списки подписчиков и подписок идут страницами по курсору — id
+последнего показанного пользователя — по индексам `(author, user)` и
+`(user, author)`, без OFFSET и COUNT(*).
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404
+
+from users.models import Profile
+
+from .models import Follow
+
+SALT = 'posts.follows'
+
+
+def _key(user_id):
+    return f'follows:{user_id}'
+
+
+def followees(user_id):
+    """Отсортированный массив id авторов, на которых подписан пользователь."""
+    ids = cache.get(_key(user_id))
+    if ids is None:
+        ids = array('I', (
+            Follow.objects.filter(user_id=user_id)
+            .order_by('author_id')
+            .values_list('author_id', flat=True)
+        ))
+        cache.set(_key(user_id), ids, settings.FOLLOW_CACHE_TIMEOUT)
+    return ids
+
+
+def is_following(user_id, author_id):
+    ids = followees(user_id)
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def changed(user_id):
+    cache.delete(_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
+
+
+def _count(user_id, author_id, delta):
+    Profile.objects.filter(user_id=author_id).update(
+        follower_count=F('follower_count') + delta,
+    )
+    Profile.objects.filter(user_id=user_id).update(
+        following_count=F('following_count') + delta,
+    )
+
+
+def follow(user, author):
+    """Подписывает пользователя одним INSERT, повтор ничего не меняет.
+
+    Возвращает True, если подписка новая. Уникальный индекс `(user,
+    author)` отсекает и повтор, и гонку двух одновременных запросов.
+    """
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        _count(instance.user_id, instance.author_id, 1)
+        changed(instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    _count(instance.user_id, instance.author_id, -1)
+    changed(instance.user_id)
+
+
+def _read_cursor(token):
+    try:
+        return int(signing.loads(token, salt=SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        raise Http404('Неверный курсор списка')
+
+
+def _page(queryset, relation, cursor):
+    limit = settings.FOLLOW_LIST_PAGE_SIZE
+    field = f'{relation}_id'
+    if cursor:
+        queryset = queryset.filter(**{f'{field}__gt': _read_cursor(cursor)})
+    rows = list(
+        queryset.order_by(field).values(
+            field,
+            username=F(f'{relation}__username'),
+            first_name=F(f'{relation}__first_name'),
+            last_name=F(f'{relation}__last_name'),
+        )[:limit + 1]
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, signing.dumps(rows[-1][field], salt=SALT)
+
+
+def followers(author_id, cursor=None):
+    """Подписчики автора по возрастанию id и курсор следующей страницы."""
+    return _page(Follow.objects.filter(author_id=author_id), 'user', cursor)
+
+
+def following(user_id, cursor=None):
+    """Авторы, на которых подписан пользователь, и курсор дальше."""
+    return _page(Follow.objects.filter(user_id=user_id), 'author', cursor)
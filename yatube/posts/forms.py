@@ -1,5 +1,6 @@
 from django import forms
 
+from .autocomplete import GroupAutocomplete
 from .models import Post, Comment
 
 
@@ -10,6 +11,9 @@ class PostForm(forms.ModelForm):
         widget = {
             'text': forms.Textarea(attrs={'cols': 40, 'rows': 10})
         }
+        widgets = {
+            'group': GroupAutocomplete(),
+        }
         labels = {
             'text': 'Текст поста',
             'group': 'Группа',
@@ -0,0 +1,90 @@
+"""Число постов и время последнего поста у каждой группы.
+
+Счётчики хранятся в `Group.post_count` и `Group.last_post_at` и
+учитывают видимые посты обеих таблиц, горячей и архивной. Новый пост
+прибавляется одним UPDATE с F(), удалённый — вычитается; перенос в
+другую группу, массовые операции и архивация пересчитывают затронутые
+группы по индексу внешнего ключа. Любое изменение меняет версию
+каталога групп, и закэшированные страницы каталога устаревают.
+"""
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import caches
+
+from .models import ArchivedPost, Group, Post
+
+NAME = 'groups:directory'
+
+
+def _changed():
+    caches.invalidate_on_commit(NAME)
+
+
+def recount(group_ids):
+    """Пересчитывает счётчики групп заново по обеим таблицам."""
+    group_ids = set(group_ids) - {None}
+    for group_id in group_ids:
+        count, last = 0, None
+        for model in (Post, ArchivedPost):
+            stats = model.objects.filter(group_id=group_id).aggregate(
+                count=Count('id'),
+                last=Max('pub_date'),
+            )
+            count += stats['count']
+            if stats['last'] is not None:
+                last = max(last or stats['last'], stats['last'])
+        Group.all_objects.filter(id=group_id).update(
+            post_count=count,
+            last_post_at=last,
+        )
+    if group_ids:
+        _changed()
+
+
+# Поля поста, от которых зависят счётчики его группы.
+FIELDS = ('group_id', 'is_deleted', 'pub_date')
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._stats_old = (
+            Post.all_objects.filter(id=instance.id)
+            .values_list(*FIELDS)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        if instance.group_id is not None and not instance.is_deleted:
+            pub_date = Value(instance.pub_date, output_field=DateTimeField())
+            Group.all_objects.filter(id=instance.group_id).update(
+                post_count=F('post_count') + 1,
+                last_post_at=Greatest(
+                    Coalesce('last_post_at', pub_date),
+                    pub_date,
+                ),
+            )
+            _changed()
+        return
+    old = getattr(instance, '_stats_old', None)
+    if old != tuple(getattr(instance, name) for name in FIELDS):
+        recount({old[0] if old else None, instance.group_id})
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if instance.group_id is None or instance.is_deleted:
+        return
+    group = Group.all_objects.filter(id=instance.group_id)
+    group.update(post_count=F('post_count') - 1)
+    if group.filter(last_post_at__lte=instance.pub_date).exists():
+        # Удалён последний пост — время берётся у предыдущего.
+        recount({instance.group_id})
+    else:
+        _changed()
@@ -0,0 +1,129 @@
+"""Карта объектов на время запроса: пользователи и группы по id.
+
+Вместо отдельного запроса на каждое `post.author` или `comment.author`
+id внешних ключей сначала собираются со всех объектов страницы, затем
+загружаются одним `id__in` на модель. Загрузчики живут на объекте
+запроса, так что каждый пользователь и каждая группа читаются из базы
+не больше одного раза за запрос.
+"""
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+
+from . import registry
+from .models import Group
+
+User = get_user_model()
+
+FIELDS = ('author', 'group')
+
+
+class Loader:
+    """Загружает объекты модели пачками и запоминает их по id."""
+
+    def __init__(self, model):
+        self.model = model
+        self._objects = {}
+        self._pending = set()
+
+    def add(self, obj):
+        self._objects[obj.pk] = obj
+
+    def prime(self, pk):
+        if pk is not None and pk not in self._objects:
+            self._pending.add(pk)
+
+    def dispatch(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, set()
+        for obj in self.model.objects.filter(id__in=pending):
+            self._objects[obj.pk] = obj
+        for pk in pending:
+            self._objects.setdefault(pk, None)
+
+    def load(self, pk):
+        if pk is None:
+            return None
+        self.prime(pk)
+        self.dispatch()
+        return self._objects[pk]
+
+
+class GroupLoader(Loader):
+    """Группы берутся из реестра процесса, без запросов к базе."""
+
+    def dispatch(self):
+        pending, self._pending = self._pending, set()
+        for pk in pending:
+            self._objects[pk] = registry.get(pk)
+
+
+def _loaders(request):
+    loaders = getattr(request, '_loaders', None)
+    if loaders is None:
+        loaders = {User: Loader(User), Group: GroupLoader(Group)}
+        if request is not None:
+            request._loaders = loaders
+    return loaders
+
+
+def get_loader(request, model):
+    return _loaders(request)[model]
+
+
+def remember(request, *objects):
+    """Добавляет уже загруженные пользователей и группы в карту."""
+    loaders = _loaders(request)
+    for obj in objects:
+        loaders[type(obj)].add(obj)
+
+
+def attach(request, objects, fields=FIELDS):
+    """Проставляет `author` и `group` объектам из загрузчиков.
+
+    Возвращает список объектов. Поля, которых нет у модели или которые
+    уже загружены, пропускаются.
+    """
+    objects = list(objects)
+    loaders = _loaders(request)
+    targets = []
+    for obj in objects:
+        for name in fields:
+            try:
+                field = obj._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.is_cached(obj):
+                continue
+            pk = getattr(obj, field.attname)
+            loader = loaders[field.related_model]
+            loader.prime(pk)
+            targets.append((obj, field, loader, pk))
+    for obj, field, loader, pk in targets:
+        field.set_cached_value(obj, loader.load(pk))
+    return objects
+
+
+class Attached:
+    """Последовательность, которая при первом чтении проставляет объектам
+    авторов и группы через `attach()`."""
+
+    def __init__(self, request, objects, fields=FIELDS):
+        self.request = request
+        self.objects = objects
+        self.fields = fields
+        self._loaded = None
+
+    def _load(self):
+        if self._loaded is None:
+            self._loaded = attach(self.request, self.objects, self.fields)
+        return self._loaded
+
+    def __len__(self):
+        return len(self._load())
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.trending import aggregate
+
+
+class Command(BaseCommand):
+    help = 'Учитывает новые посты и комментарии в популярном'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а повторять каждые --sleep секунд',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.TRENDING_INTERVAL,
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = aggregate()
+            self.stdout.write(f'Учтено постов и комментариев: {processed}')
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.purge import purge_pending
+
+
+class Command(BaseCommand):
+    help = 'Пачками удаляет помеченные на удаление посты, группы и авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые --sleep секунд',
+        )
+        parser.add_argument('--sleep', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            done = purge_pending(options['batch_size'])
+            if done:
+                self.stdout.write(f'Выполнено задач удаления: {done}')
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
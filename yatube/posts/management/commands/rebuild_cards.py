@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import cards
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт карточки лент для постов, у которых их нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POST_CARDS_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            created = cards.rebuild_missing(model, options['batch_size'])
+            self.stdout.write(f'{model.__name__}: создано {created}')
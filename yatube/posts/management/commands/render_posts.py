@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import cards
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = 'Готовит HTML текста для постов, сохранённых мимо save()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POSTS_RENDER_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перерисовать все посты, а не только посты без HTML',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Post, ArchivedPost):
+            queryset = model.all_objects.only('id', 'text').order_by('id')
+            if not options['all']:
+                queryset = queryset.filter(text_html='')
+            rendered = 0
+            last_id = 0
+            while True:
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                for post in batch:
+                    post.render_text()
+                model.all_objects.bulk_update(
+                    batch,
+                    ['text_html', 'excerpt_html'],
+                )
+                if model is ArchivedPost:
+                    # Менеджер архива не обновляет карточки сам.
+                    cards.rebuild(model, [post.id for post in batch])
+                rendered += len(batch)
+                last_id = batch[-1].id
+            self.stdout.write(f'{model.__name__}: обработано {rendered}')
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import schedule
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь пересчёт рекомендаций подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.FOLLOW_SUGGESTIONS_CHUNK_SIZE,
+            help='Сколько id пользователей считает одна задача',
+        )
+
+    def handle(self, *args, **options):
+        count = schedule(options['chunk_size'])
+        self.stdout.write(f'Поставлено задач: {count}')
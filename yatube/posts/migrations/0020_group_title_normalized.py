@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+def normalize(text):
+    # core.search.normalize на момент миграции.
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def fill_title_normalized(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    groups = Group.objects.only('id', 'title').order_by('id')
+    batch = []
+    for group in groups.iterator(chunk_size=1000):
+        group.title_normalized = normalize(group.title)
+        batch.append(group)
+        if len(batch) == 1000:
+            Group.objects.bulk_update(batch, ['title_normalized'])
+            batch = []
+    Group.objects.bulk_update(batch, ['title_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_auto_20261019_0953'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='title_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(
+            fill_title_normalized,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BATCH_SIZE = 1000
+
+
+def card(PostCard, post, archived):
+    group = post.group
+    return PostCard(
+        post_id=post.id,
+        is_archived=archived,
+        text=post.text,
+        text_html=post.text_html,
+        excerpt_html=post.excerpt_html,
+        pub_date=post.pub_date,
+        updated_at=post.updated_at,
+        author_id=post.author_id,
+        author_username=post.author.username,
+        author_first_name=post.author.first_name,
+        author_last_name=post.author.last_name,
+        group_id=post.group_id,
+        group_slug=group.slug if group else '',
+        group_title=group.title if group else '',
+        image=post.image.name or '',
+        comment_count=post.visible_comments,
+    )
+
+
+def create_cards(apps, schema_editor):
+    PostCard = apps.get_model('posts', 'PostCard')
+    for name, archived in (('Post', False), ('ArchivedPost', True)):
+        posts = (
+            apps.get_model('posts', name).objects
+            .filter(is_deleted=False)
+            .select_related('author', 'group')
+            .annotate(visible_comments=Count(
+                'comments',
+                filter=Q(comments__is_deleted=False),
+            ))
+            .order_by('id')
+        )
+        batch = []
+        for post in posts.iterator(chunk_size=BATCH_SIZE):
+            batch.append(card(PostCard, post, archived))
+            if len(batch) == BATCH_SIZE:
+                PostCard.objects.bulk_create(batch)
+                batch = []
+        PostCard.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCard',
+            fields=[
+                ('post_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('text', models.TextField()),
+                ('text_html', models.TextField(blank=True)),
+                ('excerpt_html', models.TextField(blank=True)),
+                ('pub_date', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('author_id', models.IntegerField()),
+                ('author_username', models.CharField(max_length=150)),
+                ('author_first_name', models.CharField(blank=True, max_length=150)),
+                ('author_last_name', models.CharField(blank=True, max_length=150)),
+                ('group_id', models.IntegerField(blank=True, null=True)),
+                ('group_slug', models.CharField(blank=True, max_length=50)),
+                ('group_title', models.CharField(blank=True, max_length=200)),
+                ('image', models.CharField(blank=True, max_length=100)),
+                ('thumbnail_url', models.CharField(blank=True, max_length=300)),
+                ('comment_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postcard',
+            index=models.Index(fields=['-pub_date'], name='posts_card_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcard',
+            index=models.Index(fields=['group_id', '-pub_date'], name='posts_card_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postcard',
+            index=models.Index(fields=['author_id', '-pub_date'], name='posts_card_author_idx'),
+        ),
+        migrations.RunPython(create_cards, migrations.RunPython.noop),
+    ]
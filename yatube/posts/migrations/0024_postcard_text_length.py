@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:17
+
+from django.db import migrations, models
+from django.db.models.functions import Length
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+# POST_EXCERPT_LENGTH на момент миграции.
+EXCERPT_LENGTH = 500
+
+
+def render_excerpt(text):
+    return str(linebreaksbr(
+        Truncator(text).chars(EXCERPT_LENGTH),
+        autoescape=True,
+    ))
+
+
+def fill_text_length(apps, schema_editor):
+    PostCard = apps.get_model('posts', 'PostCard')
+    PostCard.objects.update(text_length=Length('text'))
+    # Ленте больше не из чего собрать отрывок на лету.
+    cards = PostCard.objects.filter(excerpt_html='').only('text')
+    batch = []
+    for card in cards.iterator(chunk_size=1000):
+        card.excerpt_html = render_excerpt(card.text)
+        batch.append(card)
+        if len(batch) == 1000:
+            PostCard.objects.bulk_update(batch, ['excerpt_html'])
+            batch = []
+    PostCard.objects.bulk_update(batch, ['excerpt_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_postcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postcard',
+            name='text_length',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_text_length, migrations.RunPython.noop),
+    ]
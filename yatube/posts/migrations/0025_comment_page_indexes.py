@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_postcard_text_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', 'created', 'id'], name='posts_arch_comment_page_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created', 'id'], name='posts_comment_page_idx'),
+        ),
+    ]
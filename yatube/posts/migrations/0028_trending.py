@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=5)),
+                ('object_id', models.IntegerField()),
+                ('score', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_post_id', models.IntegerField(default=0)),
+                ('last_comment_id', models.IntegerField(default=0)),
+                ('decayed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['kind', '-score'], name='posts_trending_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingscore',
+            unique_together={('kind', 'object_id')},
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:26
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def count_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    models_ = [
+        apps.get_model('posts', name) for name in ('Post', 'ArchivedPost')
+    ]
+    for group in Group.objects.only('id').iterator():
+        count, last = 0, None
+        for model in models_:
+            stats = model.objects.filter(
+                group_id=group.id,
+                is_deleted=False,
+            ).aggregate(count=Count('id'), last=Max('pub_date'))
+            count += stats['count']
+            if stats['last'] is not None:
+                last = max(last or stats['last'], stats['last'])
+        Group.objects.filter(id=group.id).update(
+            post_count=count,
+            last_post_at=last,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-last_post_at'], name='posts_group_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-post_count'], name='posts_group_size_idx'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
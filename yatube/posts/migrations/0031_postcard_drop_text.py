@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_post_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='postcard',
+            name='text',
+        ),
+        migrations.RemoveField(
+            model_name='postcard',
+            name='text_html',
+        ),
+    ]
@@ -1,12 +1,67 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import DEFERRED
+from django.utils import timezone
+
+from core.search import normalize
+
+from .rendering import RenderedText
 
 User = get_user_model()
 
 
-class Post(models.Model):
+class VisibleManager(models.Manager):
+    """Скрывает объекты, помеченные на удаление фоновой чисткой."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class PostQuerySet(models.QuerySet):
+    """Массовые запись и обновление постов с обновлением `PostCard` и
+    счётчиков групп.
+
+    Сигналы `post_save` при них не отправляются, поэтому карточки и
+    счётчики обновляются здесь же, см. posts/cards.py и
+    posts/group_stats.py. Скрытие (`update(is_deleted=True)`) только
+    удаляет карточки одним запросом: счётчики групп пересчитывает
+    задача чистки, см. posts/purge.py.
+    """
+    STATS_FIELDS = {'group', 'group_id', 'is_deleted', 'pub_date'}
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import cards, group_stats
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if all(obj.pk is not None for obj in objs):
+            cards.rebuild(self.model, [obj.pk for obj in objs])
+        else:
+            cards.rebuild_missing(self.model)
+        group_stats.recount(obj.group_id for obj in objs)
+        return objs
+
+    def update(self, **kwargs):
+        from . import cards, group_stats
+        if kwargs == {'is_deleted': True}:
+            cards.forget(self.model, self.values('id'))
+            return super().update(**kwargs)
+        rows = list(self.values_list('id', 'group_id'))
+        updated = super().update(**kwargs)
+        cards.rebuild(self.model, [post_id for post_id, _ in rows])
+        if self.STATS_FIELDS & set(kwargs):
+            group_ids = {group_id for _, group_id in rows}
+            if 'group' in kwargs or 'group_id' in kwargs:
+                group = kwargs.get('group', kwargs.get('group_id'))
+                group_ids.add(getattr(group, 'pk', group))
+            group_stats.recount(group_ids)
+        return updated
+
+
+class Post(RenderedText, models.Model):
     text = models.TextField()
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt_html = models.TextField(blank=True, editable=False)
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -24,6 +79,12 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    is_deleted = models.BooleanField(default=False)
+
+    objects = VisibleManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
+
+    is_archived = False
 
     class Meta:
         ordering = ['-pub_date']
@@ -31,6 +92,10 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.render_text()
+        super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -38,10 +103,38 @@ class Group(models.Model):
         unique=True
     )
     description = models.TextField()
+    title_normalized = models.CharField(
+        max_length=200,
+        db_index=True,
+        editable=False,
+        default='',
+    )
+    is_deleted = models.BooleanField(default=False)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    last_post_at = models.DateTimeField(null=True, editable=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-last_post_at'],
+                name='posts_group_active_idx',
+            ),
+            models.Index(
+                fields=['-post_count'],
+                name='posts_group_size_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.title_normalized = normalize(self.title)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -56,9 +149,19 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    is_deleted = models.BooleanField(default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='posts_comment_page_idx',
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -75,3 +178,266 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ('user', 'author')
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='posts_follow_author_user_idx',
+            ),
+        ]
+
+
+class FollowSuggestion(models.Model):
+    """Автор, которого стоит предложить пользователю, см.
+    posts/suggestions.py."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('user', 'rank')
+
+
+class TrendingScore(models.Model):
+    """Затухающая оценка популярности поста или группы, см.
+    posts/trending.py."""
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = [
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+    ]
+
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        indexes = [
+            models.Index(
+                fields=['kind', '-score'],
+                name='posts_trending_rank_idx',
+            ),
+        ]
+
+
+class TrendingWatermark(models.Model):
+    """До каких id агрегация уже учла посты и комментарии и когда
+    оценки затухали в последний раз."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_post_id = models.IntegerField(default=0)
+    last_comment_id = models.IntegerField(default=0)
+    decayed_at = models.DateTimeField(null=True)
+
+
+class PostStats(models.Model):
+    """Просмотры поста, сброшенные из памяти процессов, см.
+    posts/view_counts.py. Ключ — id поста без внешнего ключа: счётчик
+    переживает перенос поста в архив."""
+    post_id = models.IntegerField(primary_key=True)
+    views = models.BigIntegerField(default=0)
+    viewers = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ArchivedPost(RenderedText, models.Model):
+    """Пост, перенесённый из горячей таблицы архивной задачей.
+
+    Ключ совпадает с ключом исходного поста, поэтому ссылки
+    `posts/<post_id>/` продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField()
+    text_html = models.TextField(blank=True, editable=False)
+    excerpt_html = models.TextField(blank=True, editable=False)
+    pub_date = models.DateTimeField()
+    updated_at = models.DateTimeField(default=timezone.now)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    is_deleted = models.BooleanField(default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    is_archived = True
+
+    class Meta:
+        ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
+    is_deleted = models.BooleanField(default=False)
+
+    objects = VisibleManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='posts_arch_comment_page_idx',
+            ),
+        ]
+
+
+class PurgeTask(models.Model):
+    """Фоновое удаление поста, группы или пользователя пачками."""
+    POST = 'post'
+    GROUP = 'group'
+    USER = 'user'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+        (USER, 'Пользователь'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True,
+    )
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created']
+
+    def __str__(self):
+        return f'{self.kind} #{self.object_id}'
+
+
+class PostCard(models.Model):
+    """Всё, что нужно карточке поста в ленте, в одной строке.
+
+    Поддерживается сигналами и массовыми операциями из posts/cards.py;
+    ленты читают только эту таблицу.
+    """
+    post_id = models.IntegerField(primary_key=True)
+    is_archived = models.BooleanField(default=False)
+    excerpt_html = models.TextField(blank=True)
+    text_length = models.PositiveIntegerField(default=0)
+    pub_date = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    author_id = models.IntegerField()
+    author_username = models.CharField(max_length=150)
+    author_first_name = models.CharField(max_length=150, blank=True)
+    author_last_name = models.CharField(max_length=150, blank=True)
+    group_id = models.IntegerField(null=True, blank=True)
+    group_slug = models.CharField(max_length=50, blank=True)
+    group_title = models.CharField(max_length=200, blank=True)
+    image = models.CharField(max_length=100, blank=True)
+    thumbnail_url = models.CharField(max_length=300, blank=True)
+    comment_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date'],
+                name='posts_card_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group_id', '-pub_date'],
+                name='posts_card_group_idx',
+            ),
+            models.Index(
+                fields=['author_id', '-pub_date'],
+                name='posts_card_author_idx',
+            ),
+        ]
+
+    def as_post(self):
+        """Пост с уже заполненными автором и группой, без запросов.
+
+        Полного текста в карточке нет — у поста он остаётся отложенным.
+        """
+        from . import registry
+        model = ArchivedPost if self.is_archived else Post
+        post = model(
+            id=self.post_id,
+            text=DEFERRED,
+            text_html=DEFERRED,
+            excerpt_html=self.excerpt_html,
+            pub_date=self.pub_date,
+            updated_at=self.updated_at,
+            author_id=self.author_id,
+            group_id=self.group_id,
+            image=self.image,
+        )
+        post._state.adding = False
+        post._state.db = self._state.db
+        model.author.field.set_cached_value(post, User(
+            id=self.author_id,
+            username=self.author_username,
+            first_name=self.author_first_name,
+            last_name=self.author_last_name,
+        ))
+        group = None
+        if self.group_id is not None:
+            group = registry.get(self.group_id) or Group(
+                id=self.group_id,
+                slug=self.group_slug,
+                title=self.group_title,
+            )
+        model.group.field.set_cached_value(post, group)
+        post.thumbnail_url = self.thumbnail_url
+        post.comment_count = self.comment_count
+        post.text_length = self.text_length
+        return post
@@ -0,0 +1,200 @@
+"""Фоновое удаление тяжёлых каскадов.
+
+Удаление пользователя или группы через `delete()` заставляет коллектор
+Django обходить все зависимые строки разом и держит блокировку записи
+SQLite секундами. Вместо этого `schedule_purge()` только помечает объект
+(`is_deleted`, для пользователя — `is_active=False`), после чего он
+сразу пропадает из лент, и создаёт `PurgeTask`. Счётчики групп
+пересчитывает уже чистильщик, в начале задачи. Чистильщик
+(`manage.py purge_deleted`) выполняет задачу ограниченными пачками,
+каждая в своей транзакции, и сохраняет прогресс после каждой пачки.
+
+Сохранение прогресса продлевает аренду задачи: если чистильщик умер и
+задача `PURGE_LEASE` секунд не двигалась, её забирает следующий и
+продолжает с сохранённого места. Задачи с ошибкой тоже берутся снова.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.queue import enqueue, job
+
+from . import cards, group_stats, registry
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                     Post, PurgeTask)
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_purge(instance):
+    """Скрывает объект и ставит его удаление в очередь."""
+    with transaction.atomic():
+        if isinstance(instance, Post):
+            kind = PurgeTask.POST
+            Post.all_objects.filter(id=instance.id).update(is_deleted=True)
+        elif isinstance(instance, Group):
+            kind = PurgeTask.GROUP
+            Group.all_objects.filter(id=instance.id).update(is_deleted=True)
+            registry.invalidate()
+            cards.forget_group(instance.id)
+        elif isinstance(instance, User):
+            kind = PurgeTask.USER
+            User.objects.filter(id=instance.id).update(is_active=False)
+            Post.all_objects.filter(author_id=instance.id).update(
+                is_deleted=True
+            )
+            Comment.all_objects.filter(author_id=instance.id).update(
+                is_deleted=True
+            )
+            ArchivedPost.all_objects.filter(
+                author_id=instance.id
+            ).update(is_deleted=True)
+            ArchivedComment.all_objects.filter(
+                author_id=instance.id
+            ).update(is_deleted=True)
+            cards.forget_author(instance.id)
+            cards.rebuild(Post, set(
+                Comment.all_objects.filter(author_id=instance.id)
+                .values_list('post_id', flat=True)
+            ))
+        else:
+            raise TypeError(f'Нельзя удалить в фоне {instance!r}')
+        task = PurgeTask.objects.create(kind=kind, object_id=instance.id)
+        enqueue(run_purge, args=(task.id,), dedup_key=f'purge:{task.id}')
+        return task
+
+
+def _steps(task):
+    """Пачечные шаги задачи: (queryset, действие) в порядке выполнения."""
+    object_id = task.object_id
+    if task.kind == PurgeTask.POST:
+        return [
+            (Comment.all_objects.filter(post_id=object_id), 'delete'),
+            (Post.all_objects.filter(id=object_id), 'delete'),
+        ]
+    if task.kind == PurgeTask.GROUP:
+        return [
+            (Post.all_objects.filter(group_id=object_id), 'ungroup'),
+            (ArchivedPost.all_objects.filter(group_id=object_id), 'ungroup'),
+            (Group.all_objects.filter(id=object_id), 'delete'),
+        ]
+    return [
+        (Comment.all_objects.filter(post__author_id=object_id), 'delete'),
+        (Comment.all_objects.filter(author_id=object_id), 'delete'),
+        (Post.all_objects.filter(author_id=object_id), 'delete'),
+        (
+            ArchivedComment.all_objects.filter(post__author_id=object_id),
+            'delete',
+        ),
+        (ArchivedComment.all_objects.filter(author_id=object_id), 'delete'),
+        (ArchivedPost.all_objects.filter(author_id=object_id), 'delete'),
+        (Follow.objects.filter(user_id=object_id), 'delete'),
+        (Follow.objects.filter(author_id=object_id), 'delete'),
+        (User.objects.filter(id=object_id), 'delete'),
+    ]
+
+
+def _group_ids(task):
+    """Группы, чьи счётчики ещё учитывают скрытые посты задачи."""
+    if task.kind == PurgeTask.POST:
+        posts = [Post.all_objects.filter(id=task.object_id)]
+    elif task.kind == PurgeTask.USER:
+        posts = [
+            Post.all_objects.filter(author_id=task.object_id),
+            ArchivedPost.all_objects.filter(author_id=task.object_id),
+        ]
+    else:
+        return set()
+    return {
+        group_id
+        for queryset in posts
+        for group_id in queryset.order_by().values_list(
+            'group_id',
+            flat=True,
+        ).distinct()
+    }
+
+
+def claimable():
+    """Задачи, которые можно взять: ожидающие, с ошибкой и брошенные."""
+    expired = timezone.now() - timedelta(seconds=settings.PURGE_LEASE)
+    return PurgeTask.objects.filter(
+        Q(status__in=[PurgeTask.PENDING, PurgeTask.FAILED])
+        | Q(status=PurgeTask.RUNNING, updated__lt=expired)
+    )
+
+
+def run_purge_task(task, batch_size=None):
+    """Выполняет задачу до конца, пачками не больше `batch_size` строк.
+
+    Возвращает False, если задачу уже забрал другой чистильщик.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    claimed = claimable().filter(id=task.id).update(
+        status=PurgeTask.RUNNING,
+        updated=timezone.now(),
+    )
+    if not claimed:
+        return False
+    task.refresh_from_db()
+    # Скрытые посты уже не учитываются пересчётом, поэтому после него
+    # удаление пачками счётчики не меняет.
+    group_stats.recount(_group_ids(task))
+    steps = _steps(task)
+    task.total = task.processed + sum(qs.count() for qs, _ in steps)
+    task.save(update_fields=['total', 'updated'])
+    try:
+        for queryset, action in steps:
+            while True:
+                ids = list(
+                    queryset.order_by().values_list('id', flat=True)
+                    [:batch_size]
+                )
+                if not ids:
+                    break
+                model = queryset.model
+                with transaction.atomic():
+                    batch = model._base_manager.filter(id__in=ids)
+                    if action == 'ungroup':
+                        batch.update(group=None)
+                    else:
+                        batch.delete()
+                    task.processed += len(ids)
+                    task.save(update_fields=['processed', 'updated'])
+    except Exception as error:
+        task.status = PurgeTask.FAILED
+        task.error = repr(error)
+        task.save(update_fields=['status', 'error', 'updated'])
+        raise
+    task.status = PurgeTask.DONE
+    task.save(update_fields=['status', 'updated'])
+    return True
+
+
+def purge_pending(batch_size=None):
+    """Выполняет все доступные задачи, возвращает число выполненных.
+
+    Ошибка одной задачи не мешает остальным: задача остаётся FAILED и
+    будет повторена при следующем запуске.
+    """
+    done = 0
+    for task in claimable().order_by('id'):
+        try:
+            done += run_purge_task(task, batch_size)
+        except Exception:
+            logger.exception('Задача удаления %s упала', task.id)
+    return done
+
+
+@job
+def run_purge(task_id):
+    task = PurgeTask.objects.filter(id=task_id).first()
+    if task is not None:
+        run_purge_task(task)
@@ -0,0 +1,78 @@
+"""Реестр групп в памяти процесса.
+
+Группы меняются редко, поэтому каждый процесс читает их один раз и
+держит в словарях по id и по slug. Актуальность проверяется по версии в
+общем кэше (core/caches.py): сохранение или удаление группы меняет
+версию, и каждый процесс перечитывает группы при следующем обращении.
+Изменения через `QuerySet.update()` сигналов не шлют — после них нужен
+`invalidate()`.
+
+Объекты групп общие для всех запросов процесса, менять их нельзя.
+"""
+import threading
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404
+
+from core import caches
+
+from .models import Group
+
+NAME = 'groups'
+
+_lock = threading.Lock()
+_version = None
+_by_id = {}
+_by_slug = {}
+
+
+def invalidate():
+    caches.invalidate(NAME)
+
+
+def version():
+    """Текущая версия групп; годится как часть ключей кэша."""
+    return caches.version(NAME)
+
+
+def _load():
+    global _version, _by_id, _by_slug
+    current = version()
+    if current == _version:
+        return
+    with _lock:
+        if current == _version:
+            return
+        groups = list(Group.objects.order_by('id'))
+        _by_id = {group.id: group for group in groups}
+        _by_slug = {group.slug: group for group in groups}
+        _version = current
+
+
+def get(group_id):
+    _load()
+    return _by_id.get(group_id)
+
+
+def get_by_slug(slug):
+    _load()
+    return _by_slug.get(slug)
+
+
+def get_by_slug_or_404(slug):
+    group = get_by_slug(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def groups():
+    _load()
+    return list(_by_id.values())
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    caches.invalidate_on_commit(NAME)
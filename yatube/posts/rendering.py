@@ -0,0 +1,116 @@
+"""HTML текста поста, подготовленный при сохранении.
+
+Лента и страница поста выводят готовые `text_html` и `excerpt_html`
+вместо `linebreaksbr` на каждый рендер. Строки, записанные мимо
+`save()` (`bulk_create`, `update()`), остаются без HTML, пока их не
+обработает `manage.py render_posts`; до тех пор шаблоны получают тот
+же HTML, собранный на лету.
+
+Текст длиннее `POST_TEXT_STREAM_THRESHOLD` символов страница поста не
+загружает: его отдаёт `stream_html()` кусками по `POST_TEXT_CHUNK_SIZE`,
+читая из базы `POST_TEXT_CHUNKS_PER_QUERY` кусков одним запросом
+с `SUBSTR` на каждый.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import Case, F, When
+from django.db.models.functions import Length, Substr
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+logger = logging.getLogger(__name__)
+
+
+def render_html(text):
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def render_excerpt(text):
+    return render_html(Truncator(text).chars(settings.POST_EXCERPT_LENGTH))
+
+
+class RenderedText:
+    """Примесь для моделей с полями `text`, `text_html` и `excerpt_html`."""
+
+    def render_text(self):
+        self.text_html = render_html(self.text)
+        self.excerpt_html = render_excerpt(self.text)
+
+    @property
+    def body_html(self):
+        return mark_safe(self.text_html or render_html(self.text))
+
+    @property
+    def excerpt(self):
+        return mark_safe(self.excerpt_html or render_excerpt(self.text))
+
+    @property
+    def is_truncated(self):
+        """Отрывок короче текста — карточке нужна ссылка «читать далее»."""
+        length = getattr(self, 'text_length', None)
+        if length is None:
+            length = len(self.text)
+        return length > settings.POST_EXCERPT_LENGTH
+
+
+def bound_text(queryset):
+    """Откладывает текст и HTML поста, подгружая их в том же запросе,
+    только если текст не длиннее `POST_TEXT_STREAM_THRESHOLD`."""
+    short = {'text_length__lte': settings.POST_TEXT_STREAM_THRESHOLD}
+    return queryset.defer('text', 'text_html').annotate(
+        text_length=Length('text'),
+    ).annotate(
+        short_text=Case(When(then=F('text'), **short)),
+        short_html=Case(When(then=F('text_html'), **short)),
+    )
+
+
+def unpack_text(post):
+    """Переносит короткий текст из `bound_text()` в поля поста.
+
+    У длинного поста текст остаётся отложенным, а `text_streamed`
+    истинно — шаблон выводит отрывок и ссылку на `stream_html()`.
+    """
+    post.text_streamed = post.short_text is None
+    if not post.text_streamed:
+        post.text = post.short_text
+        post.text_html = post.short_html
+    return post
+
+
+def stream_html(model, post_id, length):
+    """HTML текста поста по кускам; в памяти не больше кусков одного
+    запроса."""
+    size = settings.POST_TEXT_CHUNK_SIZE
+    step = size * settings.POST_TEXT_CHUNKS_PER_QUERY
+    queryset = model.objects.filter(id=post_id)
+    started = time.perf_counter()
+    chunks = queries = 0
+    carry = ''
+    for offset in range(1, length + 1, step):
+        row = queryset.values_list(*(
+            Substr('text', start, size)
+            for start in range(offset, min(offset + step, length + 1), size)
+        )).first()
+        queries += 1
+        if row is None:
+            break
+        for chunk in row:
+            chunk = carry + chunk
+            # \r\n на границе кусков не должен дать два переноса строки.
+            carry = '\r' if chunk.endswith('\r') else ''
+            chunks += 1
+            yield render_html(chunk[:len(chunk) - len(carry)])
+    if carry:
+        yield render_html(carry)
+    logger.info(
+        'Текст поста %s: %s символов, %s кусков, запросов: %s, %.1f мс',
+        post_id,
+        length,
+        chunks,
+        queries,
+        (time.perf_counter() - started) * 1000,
+    )
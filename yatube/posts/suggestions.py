@@ -0,0 +1,143 @@
+"""Рекомендации «на кого подписаться», посчитанные заранее.
+
+Кандидат для пользователя — автор, на которого подписаны его
+собственные подписки; оценка — число таких подписок. `manage.py
+suggest_follows` делит пользователей на диапазоны id по
+`FOLLOW_SUGGESTIONS_CHUNK_SIZE` и ставит на каждый задачу
+`compute_suggestions`; задачи выполняет пул процессов `manage.py
+worker`. Задача читает только рёбра своего диапазона и рёбра их
+подписок, считает пары в NumPy и заменяет `FollowSuggestion`
+пользователей диапазона лучшими `FOLLOW_SUGGESTIONS_TOP_K`.
+
+Вьюхи читают готовые строки одним запросом по индексу `(user, rank)`.
+"""
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+
+from jobs.queue import enqueue, job
+
+from . import follows
+from .models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+def _edges(queryset):
+    """Рёбра (user_id, author_id) как массив формы (n, 2)."""
+    rows = list(queryset.order_by().values_list('user_id', 'author_id'))
+    return np.array(rows, dtype=np.int64).reshape(-1, 2)
+
+
+def _expand(first, second):
+    """Пары (пользователь, автор) через одну промежуточную подписку.
+
+    `second` отсортирован по первому столбцу и хранит подписки тех, на
+    кого подписаны пользователи из `first`.
+    """
+    sources, starts, lengths = np.unique(
+        second[:, 0],
+        return_index=True,
+        return_counts=True,
+    )
+    users, friends = first[:, 0], first[:, 1]
+    pos = np.searchsorted(sources, friends)
+    pos = np.minimum(pos, len(sources) - 1)
+    found = sources[pos] == friends
+    users, pos = users[found], pos[found]
+    counts = lengths[pos]
+    # Индексы рёбер каждого друга подряд: начало его блока + 0, 1, ...
+    offsets = np.repeat(starts[pos] - np.cumsum(counts) + counts, counts)
+    targets = second[offsets + np.arange(counts.sum()), 1]
+    return np.repeat(users, counts), targets
+
+
+def top_suggestions(first, second, k):
+    """Лучшие `k` авторов на пользователя: (users, authors, scores, ranks).
+
+    Уже взятые подписки и сам пользователь не предлагаются; при равной
+    оценке выше автор с меньшим id.
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(first) or not len(second):
+        return empty, empty, empty, empty
+    users, authors = _expand(first, second)
+    base = int(max(first.max(), second.max())) + 1
+    keys = users * base + authors
+    followed = first[:, 0] * base + first[:, 1]
+    keep = (users != authors) & ~np.isin(keys, followed)
+    keys, scores = np.unique(keys[keep], return_counts=True)
+    users, authors = keys // base, keys % base
+    order = np.lexsort((authors, -scores, users))
+    users, authors, scores = users[order], authors[order], scores[order]
+    group_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    sizes = np.diff(np.r_[group_starts, len(users)])
+    ranks = np.arange(len(users)) - np.repeat(group_starts, sizes)
+    top = ranks < k
+    return users[top], authors[top], scores[top], ranks[top]
+
+
+@job
+def compute_suggestions(start, stop):
+    """Пересчитывает рекомендации пользователей с id в [start, stop)."""
+    chunk = Follow.objects.filter(user_id__gte=start, user_id__lt=stop)
+    first = _edges(chunk)
+    second = _edges(
+        Follow.objects.filter(user_id__in=chunk.values('author_id'))
+        .order_by('user_id', 'author_id')
+    )
+    rows = zip(*top_suggestions(
+        first,
+        second,
+        settings.FOLLOW_SUGGESTIONS_TOP_K,
+    ))
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(
+            user_id__gte=start,
+            user_id__lt=stop,
+        ).delete()
+        FollowSuggestion.objects.bulk_create(
+            [
+                FollowSuggestion(
+                    user_id=int(user),
+                    author_id=int(author),
+                    score=int(score),
+                    rank=int(rank),
+                )
+                for user, author, score, rank in rows
+            ],
+            batch_size=1000,
+        )
+
+
+def schedule(chunk_size=None):
+    """Ставит пересчёт всех пользователей в очередь; возвращает число
+    задач."""
+    chunk_size = chunk_size or settings.FOLLOW_SUGGESTIONS_CHUNK_SIZE
+    last_id = User.objects.aggregate(last=Max('id'))['last'] or 0
+    count = 0
+    for start in range(1, last_id + 1, chunk_size):
+        stop = start + chunk_size
+        enqueue(
+            compute_suggestions,
+            args=(start, stop),
+            dedup_key=f'suggestions:{start}:{stop}',
+        )
+        count += 1
+    return count
+
+
+def for_user(user, limit=None):
+    """Рекомендации для страницы: авторы с оценкой, без уже взятых."""
+    limit = limit or settings.FOLLOW_SUGGESTIONS_SHOWN
+    suggestions = (
+        FollowSuggestion.objects.filter(user=user, author__is_active=True)
+        .select_related('author')
+        .order_by('rank')[:settings.FOLLOW_SUGGESTIONS_TOP_K]
+    )
+    return [
+        suggestion for suggestion in suggestions
+        if not follows.is_following(user.id, suggestion.author_id)
+    ][:limit]
@@ -0,0 +1,22 @@
+from sorl.thumbnail import get_thumbnail
+
+from jobs.queue import job
+
+from . import cards
+from .models import Post
+
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+@job
+def make_thumbnails(post_id):
+    """Заранее создаёт миниатюру, которую покажут ленты."""
+    post = Post.objects.filter(id=post_id).first()
+    if post is not None and post.image:
+        thumbnail = get_thumbnail(
+            post.image,
+            THUMBNAIL_GEOMETRY,
+            crop='center',
+            upscale=True,
+        )
+        cards.set_thumbnail(post.id, thumbnail.url)
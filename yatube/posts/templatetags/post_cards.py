@@ -0,0 +1,54 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import loaders, registry
+from posts.cards import author_versions
+
+register = template.Library()
+
+
+def card_key(post, groups_version, author_version):
+    """Ключ карточки меняется вместе с постом, числом комментариев,
+    любой группой и именем автора."""
+    return (
+        f'post_card:{post._meta.model_name}:{post.id}:'
+        f'{post.updated_at.timestamp()}:{groups_version}:'
+        f'{author_version}:{getattr(post, "comment_count", "")}'
+    )
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, page):
+    """Список HTML-карточек постов страницы или просто списка постов.
+
+    Готовые карточки берутся из кэша одним `get_many`, рендерятся
+    только отсутствующие.
+    """
+    object_list = getattr(page, 'object_list', page)
+    # Сырые посты, без пакетной загрузки авторов и групп: она нужна
+    # только для карточек, которых нет в кэше.
+    posts = list(getattr(object_list, 'objects', object_list))
+    version = registry.version()
+    authors = author_versions(
+        {post.author_id for post in posts}
+    )
+    keys = [
+        card_key(post, version, authors[post.author_id]) for post in posts
+    ]
+    cards = cache.get_many(keys)
+    missing = [post for post, key in zip(posts, keys) if key not in cards]
+    if missing:
+        request = context.get('request')
+        rendered = {}
+        for post in loaders.attach(request, missing):
+            key = card_key(post, version, authors[post.author_id])
+            rendered[key] = render_to_string(
+                'posts/includes/post_card.html',
+                {'post': post},
+            )
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
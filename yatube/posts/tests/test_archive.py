@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import ArchivedPost, Comment, Group, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='test-group',
+            slug='test-slug',
+            description='test-descrp',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.old_post = Post.objects.create(
+            author=self.user,
+            text='old-text',
+            group=self.group,
+        )
+        Comment.objects.create(
+            post=self.old_post,
+            author=self.user,
+            text='old-comment',
+        )
+        Post.objects.filter(id=self.old_post.id).update(
+            pub_date=timezone.now() - timedelta(days=365)
+        )
+        self.new_post = Post.objects.create(
+            author=self.user,
+            text='new-text',
+            group=self.group,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_old_posts_moved_with_comments(self):
+        self.assertEqual(archive_posts(timedelta(days=30), 1), 1)
+        self.assertFalse(Post.objects.filter(id=self.old_post.id).exists())
+        archived = ArchivedPost.objects.get(id=self.old_post.id)
+        self.assertEqual(archived.comments.get().text, 'old-comment')
+        self.assertTrue(Post.objects.filter(id=self.new_post.id).exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_posts', days=30, stdout=out)
+        self.assertIn('Перенесено в архив постов: 1', out.getvalue())
+        self.assertTrue(
+            ArchivedPost.objects.filter(id=self.old_post.id).exists()
+        )
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старому адресу."""
+        archive_posts(timedelta(days=30))
+        response = self.client.get(reverse(
+            'posts:post_detail',
+            kwargs={'post_id': self.old_post.id}
+        ))
+        self.assertEqual(response.context['post'].id, self.old_post.id)
+        self.assertContains(response, 'old-comment')
+        self.assertEqual(response.context['post_count'], 2)
+
+    def test_feeds_fall_through_to_archive(self):
+        archive_posts(timedelta(days=30))
+        pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        ]
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.client.get(page)
+                ids = [post.id for post in response.context['page_obj']]
+                self.assertEqual(ids, [self.new_post.id, self.old_post.id])
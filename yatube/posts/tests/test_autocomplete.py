@@ -0,0 +1,72 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+from django.urls import reverse
+
+from ..forms import PostForm
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupAutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.groups = [
+            Group.objects.create(title=title, slug=f'group-{i}')
+            for i, title in enumerate(
+                ['Ёжики', 'Ежевика', 'Енот', 'Python', 'python  daily']
+            )
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def search(self, query):
+        response = self.client.get(
+            reverse('posts:group_autocomplete'),
+            {'q': query},
+        )
+        return [group['title'] for group in response.json()['results']]
+
+    def test_prefix_search_is_normalized(self):
+        self.assertEqual(self.search('еж'), ['Ежевика', 'Ёжики'])
+        self.assertEqual(self.search('PYTHON '), ['Python', 'python  daily'])
+        self.assertEqual(self.search('python d'), ['python  daily'])
+        self.assertEqual(self.search(''), [])
+
+    def test_odd_queries_make_valid_keys(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.search('еж\x07 '), [])
+            self.assertEqual(self.search('p' * 5000), [])
+            self.assertEqual(self.search('python  d'), ['python  daily'])
+
+    def test_results_cached_until_groups_change(self):
+        self.search('ен')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('ен'), ['Енот'])
+        self.groups[2].title = 'Енотик'
+        self.groups[2].save()
+        self.assertEqual(self.search('ен'), ['Енотик'])
+
+    def test_form_renders_no_group_list(self):
+        with self.assertNumQueries(0):
+            html = str(PostForm()['group'])
+        self.assertNotIn('Енот', html)
+        self.assertIn('data-group-autocomplete', html)
+        html = str(PostForm(instance=Post(group=self.groups[2]))['group'])
+        self.assertIn('value="Енот"', html)
+
+    def test_create_post_with_group_id(self):
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Текст', 'group': self.groups[3].id},
+        )
+        self.assertEqual(Post.objects.get().group, self.groups[3])
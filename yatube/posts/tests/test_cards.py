@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                group=self.group,
+                text=f'post {i}',
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('posts:group_list', args=(self.group.slug,))
+
+    def test_cached_cards_skip_author_loading(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertFalse(any(
+            'FROM "auth_user"' in query['sql'] for query in queries
+        ))
+        self.assertContains(response, 'post 2')
+        self.assertContains(response, '<article>', count=3)
+
+    def test_changed_post_rerendered(self):
+        self.client.get(self.url)
+        post = self.posts[0]
+        post.text = 'изменённый текст'
+        post.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'изменённый текст')
+        self.assertNotContains(response, 'post 0')
+
+    def test_author_rename_rerenders_cards(self):
+        self.client.get(reverse('posts:profile', args=(self.user.username,)))
+        author = User.objects.get(pk=self.user.pk)
+        author.username = 'renamed'
+        author.first_name = 'Новое'
+        author.save()
+        response = self.client.get(reverse('posts:profile', args=('renamed',)))
+        self.assertContains(response, 'Автор: Новое', count=3)
+        self.assertContains(
+            response,
+            reverse('posts:profile', args=('renamed',)),
+        )
+        self.assertNotContains(
+            response,
+            reverse('posts:profile', args=('auth',)),
+        )
+
+    def test_group_change_rerenders_cards(self):
+        profile_url = reverse('posts:profile', args=(self.user.username,))
+        self.client.get(profile_url)
+        self.group.slug = 'renamed'
+        self.group.save()
+        response = self.client.get(profile_url)
+        self.assertContains(
+            response,
+            reverse('posts:group_list', args=('renamed',)),
+            count=3,
+        )
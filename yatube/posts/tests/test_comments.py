@@ -0,0 +1,77 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+MORE_RE = re.compile(r'href="([^"]+\?after=[^"]+)"')
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Тест')
+        for i in range(5):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=f'comment {i}',
+            )
+        # Одинаковое время — порядок держится на id.
+        Comment.objects.update(created=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_pages_follow_cursor(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        texts = [comment.text for comment in response.context['comments']]
+        content = response.content.decode()
+        while True:
+            match = MORE_RE.search(content)
+            if match is None:
+                break
+            response = self.client.get(match.group(1))
+            self.assertNotContains(response, '<html')
+            texts += [comment.text for comment in response.context['comments']]
+            content = response.content.decode()
+        self.assertEqual(texts, [f'comment {i}' for i in range(5)])
+
+    def test_bad_cursor(self):
+        url = reverse('posts:comment_list', args=(self.post.id,))
+        response = self.client.get(url, {'after': 'forged:token'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_ajax_comment_returns_fragment(self):
+        url = reverse('posts:add_comment', args=(self.post.id,))
+        response = self.client.post(
+            url,
+            {'text': 'новый'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.status_code, 201)
+        comment = Comment.objects.get(text='новый')
+        self.assertContains(
+            response,
+            f'id="comment-{comment.id}"',
+            status_code=201,
+        )
+        self.assertNotContains(response, '<html', status_code=201)
+        response = self.client.post(
+            url,
+            {'text': ''},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertContains(response, 'data-comment-form', status_code=400)
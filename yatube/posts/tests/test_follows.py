@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowSetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}') for i in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'пост {author}')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, sum(
+            '"posts_follow"' in query['sql'] for query in queries
+        )
+
+    def test_set_kept_sorted_and_in_sync(self):
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        self.assertEqual(list(follows.followees(self.user.id)), [
+            self.authors[2].id,
+        ])
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        self.assertEqual(list(follows.followees(self.user.id)), [
+            self.authors[0].id,
+            self.authors[2].id,
+        ])
+        Follow.objects.filter(author=self.authors[2]).delete()
+        self.assertFalse(
+            follows.is_following(self.user.id, self.authors[2].id)
+        )
+
+    def test_change_drops_stale_cached_set(self):
+        """Изменение не дописывает в кэш массив, устаревший из-за
+        одновременной подписки."""
+        follows.followees(self.user.id)
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.authors[0]),
+        ])
+        Follow.objects.create(user=self.user, author=self.authors[1])
+        self.assertEqual(list(follows.followees(self.user.id)), [
+            self.authors[0].id,
+            self.authors[1].id,
+        ])
+
+    def test_views_read_cached_set(self):
+        follows.follow(self.user, self.authors[1])
+        profile = reverse('posts:profile', args=(self.authors[1].username,))
+        self.follow_queries(profile)
+        response, count = self.follow_queries(profile)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(count, 0)
+        response, count = self.follow_queries(reverse('posts:follow_index'))
+        self.assertContains(response, f'пост {self.authors[1]}')
+        self.assertNotContains(response, f'пост {self.authors[0]}')
+        self.assertEqual(count, 0)
+
+    def test_follow_is_idempotent(self):
+        follows.follow(self.user, self.authors[0])
+        follows.follow(self.user, self.authors[0])
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.authors[0].username,))
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(list(follows.followees(self.user.id)), [
+            self.authors[0].id,
+        ])
+
+    def test_counters_follow_changes(self):
+        for author in self.authors:
+            follows.follow(self.user, author)
+        follows.follow(self.user, self.authors[0])
+        Follow.objects.create(user=self.authors[1], author=self.authors[0])
+        Follow.objects.filter(user=self.user, author=self.authors[2]).delete()
+        self.user.profile.refresh_from_db()
+        self.authors[0].profile.refresh_from_db()
+        self.assertEqual(self.user.profile.following_count, 2)
+        self.assertEqual(self.authors[0].profile.follower_count, 2)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.authors[0].username,))
+        )
+        self.assertContains(response, 'Подписчиков: 2')
+
+    @override_settings(FOLLOW_LIST_PAGE_SIZE=2)
+    def test_lists_paginated_by_cursor(self):
+        for author in self.authors:
+            Follow.objects.create(user=author, author=self.user)
+        url = reverse('posts:follower_list', args=(self.user.username,))
+        response = self.client.get(url)
+        self.assertEqual(
+            [row['username'] for row in response.context['rows']],
+            ['author_0', 'author_1'],
+        )
+        response = self.client.get(
+            url,
+            {'after': response.context['next_cursor']},
+        )
+        self.assertEqual(
+            [row['username'] for row in response.context['rows']],
+            ['author_2'],
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        response = self.client.get(
+            reverse('posts:following_list', args=('author_1',))
+        )
+        self.assertContains(response, 'reader')
+        self.assertEqual(
+            self.client.get(url, {'after': '1'}).status_code,
+            404,
+        )
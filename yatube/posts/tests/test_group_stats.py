@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import Group, Post
+from ..purge import purge_pending, schedule_purge
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.first, cls.second = [
+            Group.objects.create(title=slug, slug=slug)
+            for slug in ('first', 'second')
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, group):
+        group = Group.all_objects.get(id=group.id)
+        return group.post_count, group.last_post_at
+
+    def test_counters_follow_posts(self):
+        old = Post.objects.create(author=self.user, group=self.first, text='1')
+        new = Post.objects.create(author=self.user, group=self.first, text='2')
+        self.assertEqual(self.stats(self.first), (2, new.pub_date))
+        new.group = self.second
+        new.save()
+        self.assertEqual(self.stats(self.first), (1, old.pub_date))
+        self.assertEqual(self.stats(self.second), (1, new.pub_date))
+        new.delete()
+        self.assertEqual(self.stats(self.second), (0, None))
+        Post.objects.bulk_create([
+            Post(author=self.user, group=self.second, text='3'),
+        ])
+        self.assertEqual(self.stats(self.second)[0], 1)
+        schedule_purge(old)
+        purge_pending()
+        self.assertEqual(self.stats(self.first), (0, None))
+
+    def test_save_hiding_or_redating_post_recounts(self):
+        old = Post.objects.create(author=self.user, group=self.first, text='1')
+        new = Post.objects.create(author=self.user, group=self.first, text='2')
+        new.is_deleted = True
+        new.save()
+        self.assertEqual(self.stats(self.first), (1, old.pub_date))
+        new.is_deleted = False
+        new.pub_date = old.pub_date - timedelta(days=1)
+        new.save()
+        self.assertEqual(self.stats(self.first), (2, old.pub_date))
+
+    def test_archived_posts_still_counted(self):
+        post = Post.objects.create(
+            author=self.user,
+            group=self.first,
+            text='1',
+        )
+        Post.objects.filter(id=post.id).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        archive_posts(older_than=timedelta(days=365))
+        self.assertEqual(self.stats(self.first)[0], 1)
+
+    def test_directory_sorted_and_cached(self):
+        Post.objects.create(author=self.user, group=self.second, text='1')
+        Post.objects.create(author=self.user, group=self.first, text='2')
+        Post.objects.create(author=self.user, group=self.first, text='3')
+        url = reverse('posts:group_directory')
+        response = self.client.get(url, {'sort': 'size'})
+        self.assertEqual(response.context['groups'], [self.first, self.second])
+        Post.objects.create(author=self.user, group=self.second, text='4')
+        response = self.client.get(url)
+        self.assertEqual(response.context['groups'], [self.second, self.first])
+        self.assertContains(response, 'постов: 2', count=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any(
+            'FROM "posts_group"' in query['sql'] for query in queries
+        ))
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import caches
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class LoaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.authors = [
+            User.objects.create_user(username=f'auth_{i}') for i in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(title=f'group {i}', slug=f'group-{i}')
+            for i in range(2)
+        ]
+        for i in range(6):
+            post = Post.objects.create(
+                author=cls.authors[i % 3],
+                group=cls.groups[i % 2],
+                text=f'post {i}',
+            )
+            for author in cls.authors:
+                Comment.objects.create(post=post, author=author, text='c')
+        cls.post = post
+
+    def setUp(self):
+        # Реестр групп перечитывается при новой версии из общего кэша.
+        cache.clear()
+        caches.shared().clear()
+
+    def count_queries(self, url, *tables):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [
+            sum(f'FROM "{table}"' in query['sql'] for query in queries)
+            for table in tables
+        ]
+
+    def test_post_detail_loads_each_user_once(self):
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        self.assertEqual(self.count_queries(url, 'auth_user'), [1])
+
+    def test_feed_does_not_load_authors(self):
+        # Авторы лежат в карточках, группы читает только реестр.
+        url = reverse('posts:index')
+        self.assertEqual(
+            self.count_queries(url, 'auth_user', 'posts_group'),
+            [0, 1],
+        )
+
+    def test_known_objects_not_reloaded(self):
+        group = self.groups[0]
+        url = reverse('posts:group_list', args=(group.slug,))
+        self.assertEqual(self.count_queries(url, 'posts_group'), [1])
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_posts
+from ..models import Comment, Group, Post, PostCard
+from ..purge import schedule_purge
+
+User = get_user_model()
+
+
+class CardTableTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text='Тестовый пост',
+        )
+
+    def card(self):
+        return PostCard.objects.get(post_id=self.post.id)
+
+    def test_feed_reads_only_cards(self):
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'Тестовый пост')
+        self.assertContains(response, 'Лев Толстой')
+        tables = [
+            table for table in ('posts_post"', 'auth_user', 'posts_group')
+            if any(f'FROM "{table}' in query['sql'] for query in queries)
+        ]
+        self.assertEqual(tables, [])
+        # Число карточек взято из кэша, читается только страница.
+        self.assertEqual(
+            sum('"posts_postcard"' in query['sql'] for query in queries),
+            1,
+        )
+
+    def test_feed_count_follows_cards(self):
+        url = reverse('posts:index')
+        self.assertEqual(
+            self.client.get(url).context['page_obj'].paginator.count,
+            1,
+        )
+        Post.objects.create(author=self.user, text='ещё один')
+        self.assertEqual(
+            self.client.get(url).context['page_obj'].paginator.count,
+            2,
+        )
+        self.post.delete()
+        self.assertEqual(
+            self.client.get(url).context['page_obj'].paginator.count,
+            1,
+        )
+
+    def test_card_follows_post_and_comments(self):
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertEqual(self.card().excerpt_html, 'Новый текст')
+        comment = Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='c',
+        )
+        self.assertEqual(self.card().comment_count, 1)
+        comment.delete()
+        self.assertEqual(self.card().comment_count, 0)
+        Post.objects.filter(id=self.post.id).update(text='Через update')
+        self.assertEqual(self.card().text_length, len('Через update'))
+        self.post.delete()
+        self.assertFalse(PostCard.objects.exists())
+
+    def test_card_follows_author_and_group(self):
+        self.user.first_name = 'Фёдор'
+        self.user.save()
+        self.assertEqual(self.card().author_first_name, 'Фёдор')
+        self.group.title = 'Другая'
+        self.group.save()
+        self.assertEqual(self.card().group_title, 'Другая')
+        schedule_purge(self.group)
+        card = self.card()
+        self.assertIsNone(card.group_id)
+        self.assertEqual(card.group_slug, '')
+
+    def test_purged_author_loses_cards(self):
+        author = User.objects.create_user(username='gone')
+        Post.objects.create(author=author, text='Пропадёт')
+        Comment.objects.create(post=self.post, author=author, text='c')
+        schedule_purge(author)
+        self.assertFalse(PostCard.objects.filter(author_id=author.id).exists())
+        self.assertEqual(self.card().comment_count, 0)
+
+    def test_archived_post_keeps_card(self):
+        Post.objects.filter(id=self.post.id).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        archive_posts(older_than=timedelta(days=365))
+        self.assertTrue(self.card().is_archived)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_rebuild_cards_fills_gaps(self):
+        PostCard.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_cards', stdout=out)
+        self.assertIn('Post: создано 1', out.getvalue())
+        self.assertEqual(self.card().author_username, 'auth')
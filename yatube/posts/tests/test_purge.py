@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, PostCard, PurgeTask
+from ..purge import purge_pending, schedule_purge
+
+User = get_user_model()
+
+
+class PurgeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='test-group',
+            slug='test-slug',
+            description='test-descrp',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='test-text',
+            group=self.group,
+        )
+        Comment.objects.create(
+            post=self.post,
+            author=self.reader,
+            text='test-comment',
+        )
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_post_delete_hides_then_purges(self):
+        self.authorized_client.get(reverse(
+            'posts:post_delete',
+            kwargs={'post_id': self.post.id}
+        ))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotIn(self.post, response.context['page_obj'])
+        self.assertTrue(Post.all_objects.filter(id=self.post.id).exists())
+        self.assertEqual(purge_pending(batch_size=1), 1)
+        self.assertFalse(Post.all_objects.filter(id=self.post.id).exists())
+        self.assertFalse(Comment.all_objects.exists())
+
+    def test_group_purge_ungroups_posts(self):
+        task = schedule_purge(self.group)
+        response = self.authorized_client.get(reverse(
+            'posts:group_list',
+            kwargs={'slug': 'test-slug'}
+        ))
+        self.assertEqual(response.status_code, 404)
+        purge_pending(batch_size=1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, PurgeTask.DONE)
+        self.assertEqual((task.processed, task.total), (2, 2))
+        self.post.refresh_from_db()
+        self.assertIsNone(self.post.group_id)
+
+    def test_user_purge_removes_content_in_batches(self):
+        Follow.objects.create(user=self.reader, author=self.user)
+        schedule_purge(self.reader)
+        self.assertFalse(self.post.comments.exists())
+        task = PurgeTask.objects.get()
+        purge_pending(batch_size=1)
+        task.refresh_from_db()
+        self.assertEqual(task.processed, 3)
+        self.assertFalse(User.objects.filter(id=self.reader.id).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(Post.objects.filter(id=self.post.id).exists())
+
+    def test_hiding_author_does_not_rebuild_cards(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, group=self.group, text=f'пост {i}')
+            for i in range(20)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            schedule_purge(self.user)
+        self.assertFalse(any(
+            '"posts_post"."text"' in query['sql'] for query in queries
+        ))
+        self.assertFalse(PostCard.objects.filter(author_id=self.user.id))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 21)
+        purge_pending()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+
+    @override_settings(PURGE_LEASE=60)
+    def test_interrupted_and_failed_tasks_resumed(self):
+        schedule_purge(self.reader)
+        task = PurgeTask.objects.get()
+        # Чистильщик успел удалить комментарий и умер.
+        Comment.all_objects.filter(author=self.reader).delete()
+        PurgeTask.objects.filter(id=task.id).update(
+            status=PurgeTask.RUNNING,
+            processed=1,
+        )
+        self.assertEqual(purge_pending(), 0)
+        PurgeTask.objects.filter(id=task.id).update(
+            updated=timezone.now() - timedelta(seconds=61),
+        )
+        self.assertEqual(purge_pending(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, PurgeTask.DONE)
+        self.assertEqual((task.processed, task.total), (2, 2))
+        self.assertFalse(User.objects.filter(id=self.reader.id).exists())
+
+        schedule_purge(self.post)
+        PurgeTask.objects.filter(status=PurgeTask.PENDING).update(
+            status=PurgeTask.FAILED,
+        )
+        self.assertEqual(purge_pending(), 1)
+        self.assertFalse(Post.all_objects.filter(id=self.post.id).exists())
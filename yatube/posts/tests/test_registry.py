@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import registry
+from ..models import Group
+
+User = get_user_model()
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='group')
+
+    def test_lookups_cached_in_process(self):
+        registry.groups()
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.get(self.group.id), self.group)
+            self.assertEqual(registry.get_by_slug('group'), self.group)
+
+    def test_save_and_delete_invalidate(self):
+        registry.groups()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(registry.get(self.group.id).title, 'Новое название')
+        self.group.delete()
+        self.assertIsNone(registry.get_by_slug('group'))
+
+    def test_other_process_bump_reloads(self):
+        registry.groups()
+        Group.objects.filter(id=self.group.id).update(slug='renamed')
+        self.assertIsNotNone(registry.get_by_slug('group'))
+        registry.invalidate()
+        self.assertIsNotNone(registry.get_by_slug('renamed'))
+
+    def test_group_page_uses_registry(self):
+        registry.groups()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                registry.get_by_slug_or_404('group'),
+                self.group,
+            )
+        response = self.client.get(
+            reverse('posts:group_list', args=('group',))
+        )
+        self.assertEqual(response.context['group'], self.group)
+        self.assertEqual(
+            self.client.get(reverse('posts:group_list', args=('x',)))
+            .status_code,
+            404,
+        )
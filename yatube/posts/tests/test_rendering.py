@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_html_rendered_on_save(self):
+        post = Post.objects.create(author=self.user, text='<b>a</b>\nb')
+        self.assertEqual(post.text_html, '&lt;b&gt;a&lt;/b&gt;<br>b')
+        post.text = 'c'
+        post.save()
+        self.assertEqual(Post.objects.get().text_html, 'c')
+
+    @override_settings(POST_EXCERPT_LENGTH=10)
+    def test_feed_shows_excerpt_and_detail_full_text(self):
+        post = Post.objects.create(author=self.user, text='слово ' * 10)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'слово сло…')
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.id,))
+        )
+        self.assertContains(response, post.text.strip())
+
+    @override_settings(POST_EXCERPT_LENGTH=10)
+    def test_feed_skips_full_text_and_links_long_posts(self):
+        long_post = Post.objects.create(author=self.user, text='слово ' * 10)
+        Post.objects.create(author=self.user, text='коротко')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(any(
+            '"posts_postcard"."text"' in query['sql'] for query in queries
+        ))
+        self.assertContains(response, 'читать далее', count=1)
+        self.assertContains(
+            response,
+            reverse('posts:post_detail', args=(long_post.id,)),
+        )
+
+    @override_settings(
+        POST_TEXT_STREAM_THRESHOLD=20,
+        POST_TEXT_CHUNK_SIZE=7,
+        POST_TEXT_CHUNKS_PER_QUERY=3,
+    )
+    def test_long_text_streamed_in_chunks(self):
+        text = 'строка\r\n' * 5 + '<конец>'
+        post = Post.objects.create(author=self.user, text=text)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.id,))
+        )
+        self.assertTrue(response.context['post'].text_streamed)
+        self.assertNotIn('text', response.context['post'].__dict__)
+        self.assertContains(
+            response,
+            reverse('posts:post_text', args=(post.id,)),
+        )
+        with self.assertLogs('posts.rendering') as logs:
+            response = self.client.get(
+                reverse('posts:post_text', args=(post.id,))
+            )
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body, post.text_html)
+        self.assertIn(
+            f'{len(text)} символов, 7 кусков, запросов: 3',
+            logs.output[0],
+        )
+
+    def test_bulk_created_posts_fall_back_and_backfill(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'a\n{i}') for i in range(3)
+        ])
+        post = Post.objects.first()
+        self.assertEqual(post.text_html, '')
+        self.assertEqual(post.body_html, f'a<br>{post.text[-1]}')
+        call_command('render_posts', batch_size=2, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
@@ -0,0 +1,71 @@
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from ..suggestions import top_suggestions
+
+User = get_user_model()
+
+
+class TopSuggestionsTests(TestCase):
+    def test_counts_co_follows(self):
+        # 1 подписан на 2 и 3; 2 и 3 подписаны на 4, 3 — ещё на 5 и 1.
+        first = np.array([[1, 2], [1, 3]])
+        second = np.array([[2, 4], [3, 1], [3, 4], [3, 5]])
+        users, authors, scores, ranks = top_suggestions(first, second, 5)
+        self.assertEqual(users.tolist(), [1, 1])
+        self.assertEqual(authors.tolist(), [4, 5])
+        self.assertEqual(scores.tolist(), [2, 1])
+        self.assertEqual(ranks.tolist(), [0, 1])
+        _, authors, _, _ = top_suggestions(first, second, 1)
+        self.assertEqual(authors.tolist(), [4])
+
+    def test_followed_authors_skipped(self):
+        first = np.array([[1, 2], [1, 3]])
+        second = np.array([[2, 3]])
+        users, _, _, _ = top_suggestions(first, second, 5)
+        self.assertEqual(len(users), 0)
+
+
+@override_settings(JOBS_EAGER=True, FOLLOW_SUGGESTIONS_CHUNK_SIZE=2)
+class SuggestFollowsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.star = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'star')
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.star)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_command_fills_table_and_views_show_it(self):
+        out = StringIO()
+        call_command('suggest_follows', stdout=out)
+        self.assertIn('Поставлено задач', out.getvalue())
+        suggestion = FollowSuggestion.objects.get()
+        self.assertEqual(suggestion.user, self.reader)
+        self.assertEqual(suggestion.author, self.star)
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=(self.friend.username,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['suggestions'],
+                    [suggestion],
+                )
+        Follow.objects.create(user=self.reader, author=self.star)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'], [])
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Group, Post, TrendingScore
+
+User = get_user_model()
+
+
+@override_settings(
+    TRENDING_POST_WEIGHT=1.0,
+    TRENDING_COMMENT_WEIGHT=0.5,
+    TRENDING_HALF_LIFE=3600,
+    TRENDING_BATCH_SIZE=2,
+)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.quiet, cls.busy = [
+            Group.objects.create(title=title, slug=title)
+            for title in ('quiet', 'busy')
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(author=self.user, group=group, text=text)
+            for group, text in (
+                (self.quiet, 'тихий'),
+                (self.busy, 'шумный'),
+                (None, 'без группы'),
+            )
+        ]
+        for _ in range(3):
+            Comment.objects.create(
+                post=self.posts[1],
+                author=self.user,
+                text='c',
+            )
+
+    def score(self, kind, object_id):
+        return TrendingScore.objects.get(kind=kind, object_id=object_id).score
+
+    def test_scores_added_once_and_decayed(self):
+        now = timezone.now()
+        self.assertEqual(trending.aggregate(now), 6)
+        self.assertAlmostEqual(
+            self.score(TrendingScore.POST, self.posts[1].id),
+            2.5,
+            places=2,
+        )
+        self.assertAlmostEqual(
+            self.score(TrendingScore.GROUP, self.busy.id),
+            2.5,
+            places=2,
+        )
+        self.assertEqual(trending.aggregate(now + timedelta(hours=1)), 0)
+        self.assertAlmostEqual(
+            self.score(TrendingScore.POST, self.posts[1].id),
+            1.25,
+            places=2,
+        )
+        Comment.objects.create(post=self.posts[0], author=self.user, text='c')
+        self.assertEqual(trending.aggregate(now + timedelta(hours=1)), 1)
+        self.assertAlmostEqual(
+            self.score(TrendingScore.GROUP, self.quiet.id),
+            0.5 + 0.5 * 0.5,
+            places=2,
+        )
+
+    def test_existing_scores_updated_in_one_query(self):
+        ids = [post.id for post in self.posts]
+        trending._add({(TrendingScore.POST, post_id): 1.0 for post_id in ids})
+        with CaptureQueriesContext(connection) as queries:
+            trending._add({
+                (TrendingScore.POST, post_id): index
+                for index, post_id in enumerate(ids)
+            })
+        updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            [self.score(TrendingScore.POST, post_id) for post_id in ids],
+            [1.0, 2.0, 3.0],
+        )
+
+    @override_settings(TRENDING_MIN_SCORE=0.6)
+    def test_faded_scores_removed(self):
+        now = timezone.now()
+        trending.aggregate(now)
+        trending.aggregate(now + timedelta(hours=1))
+        self.assertFalse(
+            TrendingScore.objects.filter(
+                kind=TrendingScore.POST,
+                object_id=self.posts[0].id,
+            ).exists()
+        )
+
+    def test_pages_ranked(self):
+        trending.aggregate()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(response.context['posts'][0], self.posts[1])
+        self.assertEqual(
+            [group for group, _ in response.context['groups']],
+            [self.busy, self.quiet],
+        )
+        self.assertContains(response, 'шумный')
+        response = self.client.get(
+            reverse('posts:group_directory'),
+            {'sort': 'trending'},
+        )
+        self.assertEqual(response.context['groups'], [self.busy, self.quiet])
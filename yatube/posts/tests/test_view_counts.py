@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import background
+
+from .. import view_counts
+from ..models import Post, PostStats
+
+User = get_user_model()
+
+
+@override_settings(POST_VIEWS_FLUSH_INTERVAL=3600, POST_VIEWS_MAX_PENDING=3)
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='пост')
+        cls.url = reverse('posts:post_detail', args=(cls.post.id,))
+
+    def setUp(self):
+        view_counts.flush()
+        PostStats.objects.all().delete()
+
+    def stats_writes(self, queries):
+        return sum(
+            '"posts_poststats"' in query['sql']
+            and not query['sql'].startswith('SELECT')
+            for query in queries
+        )
+
+    def test_views_buffered_until_flush(self):
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                self.client.get(self.url)
+        self.assertEqual(self.stats_writes(queries), 0)
+        self.assertFalse(PostStats.objects.exists())
+        self.assertEqual(view_counts.get(self.post.id), (3, 1))
+
+        self.assertEqual(view_counts.flush(), 1)
+        stats = PostStats.objects.get(post_id=self.post.id)
+        self.assertEqual(stats.views, 3)
+        self.assertEqual(view_counts.get(self.post.id), (3, 1))
+
+    def test_flush_adds_to_stored_counts(self):
+        for viewer in ('a', 'b'):
+            view_counts.record(self.post.id, viewer)
+        view_counts.flush()
+        for viewer in ('b', 'c', 'c'):
+            view_counts.record(self.post.id, viewer)
+        view_counts.flush()
+        stats = PostStats.objects.get(post_id=self.post.id)
+        self.assertEqual(stats.views, 5)
+        self.assertEqual(view_counts.get(self.post.id), (5, 3))
+
+    def test_full_buffer_flushes_in_one_batch(self):
+        posts = [
+            Post.objects.create(author=self.user, text=f'пост {i}')
+            for i in range(2)
+        ]
+        view_counts.record(posts[0].id, 'a')
+        view_counts.record(posts[1].id, 'a')
+        self.assertFalse(PostStats.objects.exists())
+        view_counts.record(self.post.id, 'a')
+        self.assertEqual(PostStats.objects.count(), 3)
+
+    def test_anonymous_viewers_told_apart(self):
+        self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.client.get(self.url, REMOTE_ADDR='10.0.0.2')
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.context['views'], 3)
+        self.assertEqual(response.context['viewers'], 3)
+        self.assertContains(response, 'Просмотров: 3, зрителей: около 3')
+
+
+@override_settings(POST_VIEWS_FLUSH_INTERVAL=3600, POST_VIEWS_MAX_PENDING=2)
+class FlusherTests(TransactionTestCase):
+    def setUp(self):
+        view_counts.flush()
+        PostStats.objects.all().delete()
+        user = User.objects.create_user(username='auth')
+        self.posts = [
+            Post.objects.create(author=user, text=f'пост {i}')
+            for i in range(2)
+        ]
+
+    def test_requests_leave_flush_to_thread(self):
+        flusher = background.Flusher(view_counts.flush, 3600, 'test')
+        with mock.patch.object(view_counts, 'flusher', return_value=flusher):
+            with CaptureQueriesContext(connection) as queries:
+                for post in self.posts:
+                    view_counts.record(post.id, 'a')
+            flusher.stop()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            sorted(PostStats.objects.values_list('post_id', 'views')),
+            [(post.id, 1) for post in self.posts],
+        )
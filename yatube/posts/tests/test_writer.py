@@ -0,0 +1,122 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..writer import Writer, WriteTimeout, WriteUnconfirmed
+
+User = get_user_model()
+
+
+class WriterTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='test-text')
+
+    def test_batch_keeps_submission_order(self):
+        """Объекты пачки получают ключи в порядке поступления."""
+        writer = Writer(interval=0.01, max_batch=10)
+        comments = [
+            writer.submit(Comment(
+                post=self.post, author=self.user, text=f'comment-{i}'
+            ), timeout=5)
+            for i in range(3)
+        ]
+        ids = [comment.id for comment in comments]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(self.post.comments.count(), 3)
+
+    def test_failed_object_does_not_break_batch(self):
+        """Ошибка одного объекта достаётся только его запросу."""
+        writer = Writer(interval=0.01, max_batch=10)
+        with self.assertRaises(Exception):
+            writer.submit(Comment(post=self.post, text='no-author'), 5)
+        comment = writer.submit(Comment(
+            post=self.post, author=self.user, text='ok'
+        ), timeout=5)
+        self.assertTrue(Comment.objects.filter(id=comment.id).exists())
+
+    def test_mixed_batch_commits_good_objects(self):
+        """Откат пачки из-за одного объекта не теряет остальные, а ошибку
+        получает только отправивший его запрос."""
+        writer = Writer(interval=0.2, max_batch=10)
+        batches = []
+        commit = writer._commit
+
+        def record_batch(batch):
+            batches.append(len(batch))
+            commit(batch)
+
+        writer._commit = record_batch
+        comments = [
+            Comment(post=self.post, author=self.user, text='first'),
+            Comment(post=self.post, text='no-author'),
+            Comment(post=self.post, author=self.user, text='second'),
+        ]
+        results = {}
+
+        def submit(comment):
+            try:
+                results[comment.text] = writer.submit(comment, timeout=5)
+            except Exception as error:
+                results[comment.text] = error
+
+        threads = [
+            threading.Thread(target=submit, args=(comment,))
+            for comment in comments
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(batches, [3])
+        self.assertIsInstance(results['no-author'], Exception)
+        for text in ('first', 'second'):
+            self.assertIsInstance(results[text], Comment)
+            self.assertTrue(
+                Comment.objects.filter(id=results[text].id, text=text)
+                .exists()
+            )
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_timeout_cancels_write(self):
+        writer = Writer(interval=0.01, max_batch=10)
+        writer._queue.put((None, _BlockingFuture()))
+        with self.assertRaises(WriteTimeout):
+            writer.submit(Comment(
+                post=self.post, author=self.user, text='late'
+            ), timeout=0.01)
+        self.assertFalse(Comment.objects.filter(text='late').exists())
+
+    def test_started_write_waits_bounded(self):
+        writer = Writer(interval=0.01, max_batch=10, commit_timeout=0.05)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        writer._commit = lambda batch: release.wait(5)
+        with self.assertRaises(WriteUnconfirmed):
+            writer.submit(Comment(
+                post=self.post, author=self.user, text='slow'
+            ), timeout=0.2)
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_add_comment_through_writer(self):
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'test_comment'},
+        )
+        self.assertTrue(
+            self.post.comments.filter(text='test_comment').exists()
+        )
+
+
+class _BlockingFuture:
+    """Подвешивает писателя, чтобы следующий объект не успел начаться."""
+
+    def set_running_or_notify_cancel(self):
+        time.sleep(0.2)
+        return False
@@ -0,0 +1,159 @@
+"""Популярные посты и группы по затухающим оценкам.
+
+`aggregate()` запускается по расписанию (`manage.py aggregate_trending`)
+и читает только посты и комментарии с id больше водяных знаков в
+`TrendingWatermark`. Каждое событие добавляет вес, уменьшенный вдвое
+за каждые `TRENDING_HALF_LIFE` секунд своего возраста: пост — себе и
+своей группе, комментарий — посту и его группе. Перед этим все оценки
+затухают на время с прошлого запуска одним UPDATE, а строки ниже
+`TRENDING_MIN_SCORE` удаляются, так что таблица остаётся маленькой.
+
+Страницы читают первые `TRENDING_SIZE` строк по индексу
+`(kind, -score)`.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import registry
+from .models import Comment, Post, PostCard, TrendingScore, TrendingWatermark
+
+WATERMARK = 'trending'
+
+
+def decay(seconds):
+    return 0.5 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def _add(scores):
+    """Прибавляет оценки {(kind, object_id): delta}."""
+    by_kind = defaultdict(dict)
+    for (kind, object_id), delta in scores.items():
+        by_kind[kind][object_id] = delta
+    for kind, deltas in by_kind.items():
+        rows = list(
+            TrendingScore.objects.select_for_update()
+            .filter(kind=kind, object_id__in=list(deltas))
+            .only('id', 'object_id')
+        )
+        for row in rows:
+            row.score = F('score') + deltas[row.object_id]
+        # Один UPDATE с CASE по всем строкам вместо UPDATE на строку.
+        TrendingScore.objects.bulk_update(rows, ['score'])
+        existing = {row.object_id for row in rows}
+        TrendingScore.objects.bulk_create([
+            TrendingScore(kind=kind, object_id=object_id, score=delta)
+            for object_id, delta in deltas.items()
+            if object_id not in existing
+        ])
+
+
+def _decay_all(state, now):
+    if state.decayed_at is not None:
+        factor = decay((now - state.decayed_at).total_seconds())
+        TrendingScore.objects.update(score=F('score') * factor)
+        TrendingScore.objects.filter(
+            score__lt=settings.TRENDING_MIN_SCORE,
+        ).delete()
+    state.decayed_at = now
+
+
+def _new_posts(state, scores, now):
+    rows = list(
+        Post.all_objects.filter(id__gt=state.last_post_id)
+        .order_by('id')
+        .values_list('id', 'group_id', 'pub_date', 'is_deleted')
+        [:settings.TRENDING_BATCH_SIZE]
+    )
+    for post_id, group_id, pub_date, is_deleted in rows:
+        if is_deleted:
+            continue
+        weight = settings.TRENDING_POST_WEIGHT * decay(
+            (now - pub_date).total_seconds()
+        )
+        scores[TrendingScore.POST, post_id] += weight
+        if group_id is not None:
+            scores[TrendingScore.GROUP, group_id] += weight
+    if rows:
+        state.last_post_id = rows[-1][0]
+    return len(rows)
+
+
+def _new_comments(state, scores, now):
+    rows = list(
+        Comment.all_objects.filter(id__gt=state.last_comment_id)
+        .order_by('id')
+        .values_list('id', 'post_id', 'post__group_id', 'created',
+                     'is_deleted')
+        [:settings.TRENDING_BATCH_SIZE]
+    )
+    for _, post_id, group_id, created, is_deleted in rows:
+        if is_deleted:
+            continue
+        weight = settings.TRENDING_COMMENT_WEIGHT * decay(
+            (now - created).total_seconds()
+        )
+        scores[TrendingScore.POST, post_id] += weight
+        if group_id is not None:
+            scores[TrendingScore.GROUP, group_id] += weight
+    if rows:
+        state.last_comment_id = rows[-1][0]
+    return len(rows)
+
+
+def aggregate(now=None):
+    """Учитывает новые посты и комментарии; возвращает их число."""
+    now = now or timezone.now()
+    processed = 0
+    decayed = False
+    while True:
+        with transaction.atomic():
+            state, _ = TrendingWatermark.objects.get_or_create(
+                name=WATERMARK,
+            )
+            if not decayed:
+                _decay_all(state, now)
+                decayed = True
+            scores = defaultdict(float)
+            count = _new_posts(state, scores, now)
+            count += _new_comments(state, scores, now)
+            _add(scores)
+            state.save()
+        processed += count
+        if count < settings.TRENDING_BATCH_SIZE:
+            return processed
+
+
+def _top(kind, limit):
+    return list(
+        TrendingScore.objects.filter(kind=kind)
+        .order_by('-score')
+        .values_list('object_id', 'score')[:limit]
+    )
+
+
+def top_posts(limit=None):
+    """Популярные посты из карточек, от самого популярного."""
+    ids = [
+        object_id for object_id, _ in
+        _top(TrendingScore.POST, limit or settings.TRENDING_SIZE)
+    ]
+    cards = PostCard.objects.filter(post_id__in=ids)
+    posts = {card.post_id: card.as_post() for card in cards}
+    return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+def top_groups(limit=None):
+    """Пары (группа, оценка) от самой популярной группы."""
+    groups = []
+    for group_id, score in _top(
+        TrendingScore.GROUP,
+        limit or settings.TRENDING_SIZE,
+    ):
+        group = registry.get(group_id)
+        if group is not None:
+            groups.append((group, score))
+    return groups
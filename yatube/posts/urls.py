@@ -6,11 +6,19 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending_index, name='trending'),
+    path('groups/', views.group_directory, name='group_directory'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'groups/autocomplete/',
+        views.group_autocomplete,
+        name='group_autocomplete'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/text/', views.post_text, name='post_text'),
     path(
         'posts/<int:post_id>/deletion/',
         views.post_delete,
@@ -21,7 +29,22 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comment_list'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'profile/<str:username>/followers/',
+        views.follower_list,
+        name='follower_list'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following_list,
+        name='following_list'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -0,0 +1,38 @@
+from django.core import paginator
+from django.utils.functional import cached_property
+
+from core.instrumentation import current_view_name
+from core.metrics import PAGINATOR_COUNTS
+
+from . import loaders
+
+POSTS_PER_PAGE = 10
+
+
+class Paginator(paginator.Paginator):
+    """Paginator, который считает свои запросы COUNT(*)."""
+
+    def __init__(self, object_list, per_page, request=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.request = request
+
+    @cached_property
+    def count(self):
+        PAGINATOR_COUNTS.inc(view=current_view_name())
+        return paginator.Paginator.count.func(self)
+
+    def _get_page(self, object_list, number, paginator):
+        # Авторы и группы постов страницы загружаются пачкой при первом
+        # обращении к ней, см. posts/loaders.py.
+        return super()._get_page(
+            loaders.Attached(self.request, object_list),
+            number,
+            paginator,
+        )
+
+
+def paginate(request, object_list):
+    """Возвращает страницу `page_obj` для номера из `?page=`."""
+    paginator = Paginator(object_list, POSTS_PER_PAGE, request=request)
+    page_number = request.GET.get('page')
+    return paginator.get_page(page_number)
@@ -0,0 +1,147 @@
+"""Счётчики просмотров постов с отложенной записью.
+
+UPDATE на каждый просмотр выстроил бы все чтения поста в очередь за
+блокировкой записи SQLite. Поэтому `record()` только прибавляет
+просмотр в памяти процесса, а в базу (`PostStats`) накопленное уходит
+одной транзакцией раз в `POST_VIEWS_FLUSH_INTERVAL` секунд — или
+раньше, если в буфере набралось `POST_VIEWS_MAX_PENDING` постов.
+
+Сбрасывает буфер фоновый поток процесса сервера (core/background.py),
+который `record()` запускает при первом просмотре, так что запросы в
+базу не пишут. Где потоков нет (тесты, команды), полный буфер
+сбрасывает сам `record()`.
+
+Уникальные зрители считаются приблизительно, скетчем HyperLogLog на
+пост: память на пост постоянна и не зависит от числа зрителей, а скетчи
+процессов и базы объединяются без двойного счёта. Точность задаёт
+`POST_VIEWS_PRECISION`; её смена требует очистки `PostStats`.
+
+При выходе процесса буфер сбрасывается; просмотры теряются, только
+если процесс убит, — это цена отсутствия записи в базу на каждом
+запросе.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core import background
+from core.hyperloglog import HyperLogLog
+
+from .models import PostStats
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# {post_id: [просмотры, скетч зрителей]}
+_pending = {}
+
+
+def _sketch(registers=None):
+    return HyperLogLog(settings.POST_VIEWS_PRECISION, registers)
+
+
+def viewer_key(request):
+    """Зритель: пользователь, а для анонимов — адрес и браузер."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'anon:{}:{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+def _merge(pending):
+    for post_id, (views, sketch) in pending.items():
+        entry = _pending.get(post_id)
+        if entry is None:
+            _pending[post_id] = [views, sketch]
+        else:
+            entry[0] += views
+            entry[1].merge(sketch)
+
+
+def record(post_id, viewer):
+    with _lock:
+        entry = _pending.get(post_id)
+        if entry is None:
+            entry = _pending[post_id] = [0, _sketch()]
+        entry[0] += 1
+        entry[1].add(viewer)
+        full = len(_pending) >= settings.POST_VIEWS_MAX_PENDING
+    thread = flusher()
+    if full:
+        if thread is None:
+            flush()
+        else:
+            thread.wake()
+
+
+def _write(pending):
+    ids = list(pending)
+    with transaction.atomic():
+        # Первая запись берёт блокировку базы до чтения регистров, так
+        # что параллельный сброс другого процесса их не перезапишет.
+        PostStats.objects.filter(post_id__in=ids).update(
+            updated_at=timezone.now(),
+        )
+        stored = dict(
+            PostStats.objects.filter(post_id__in=ids)
+            .values_list('post_id', 'viewers')
+        )
+        for post_id, registers in stored.items():
+            views, sketch = pending[post_id]
+            sketch.merge(_sketch(registers))
+            PostStats.objects.filter(post_id=post_id).update(
+                views=F('views') + views,
+                viewers=bytes(sketch),
+            )
+        PostStats.objects.bulk_create([
+            PostStats(post_id=post_id, views=views, viewers=bytes(sketch))
+            for post_id, (views, sketch) in pending.items()
+            if post_id not in stored
+        ])
+
+
+def flush():
+    """Записывает накопленные просмотры; возвращает число постов."""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+    try:
+        _write(pending)
+    except DatabaseError:
+        # Просмотры возвращаются в буфер до следующего сброса.
+        logger.exception('Не удалось сбросить просмотры постов')
+        with _lock:
+            _merge(pending)
+        return 0
+    return len(pending)
+
+
+flusher = background.lazy(
+    flush,
+    'POST_VIEWS_FLUSH_INTERVAL',
+    'posts-view-counts',
+)
+
+
+def get(post_id):
+    """Просмотры и оценка уникальных зрителей, с учётом буфера."""
+    row = (
+        PostStats.objects.filter(post_id=post_id)
+        .values_list('views', 'viewers')
+        .first()
+    )
+    views, sketch = (row[0], _sketch(row[1])) if row else (0, _sketch())
+    with _lock:
+        entry = _pending.get(post_id)
+        if entry is not None:
+            views += entry[0]
+            sketch.merge(entry[1])
+    return views, sketch.count()
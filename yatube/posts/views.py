@@ -1,33 +1,98 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth import get_user_model
 
+from core import caches, swr
+from jobs.queue import enqueue
+
+from . import (comment_pages, follows, group_stats, loaders, registry,
+               rendering, suggestions, trending, view_counts, writer)
+from .archive import get_post_or_404
+from .autocomplete import search_groups
+from .cards import CardFeed
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Follow
+from .models import Follow, Group, Post, PostCard
+from .purge import schedule_purge
+from .tasks import make_thumbnails
+from .utils import paginate
 
 User = get_user_model()
 
+# Порядки каталога групп; для каждого есть индекс.
+GROUP_ORDERINGS = {
+    'active': '-last_post_at',
+    'size': '-post_count',
+    'trending': None,
+}
+
 
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, CardFeed(PostCard.objects.all(), key='all'))
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+def trending_index(request):
+    template = 'posts/trending.html'
+    context = {
+        'posts': trending.top_posts(),
+        'groups': trending.top_groups(),
+        'trending': True,
+    }
+    return render(request, template, context)
+
+
+def group_directory(request):
+    template = 'posts/group_directory.html'
+    sort = request.GET.get('sort')
+    if sort not in GROUP_ORDERINGS:
+        sort = 'active'
+    if sort == 'trending':
+        groups = [
+            group for group, _ in
+            trending.top_groups(settings.GROUP_DIRECTORY_SIZE)
+        ]
+    else:
+        # Версия меняется с каждым постом или группой, так что в кэше
+        # лежит только актуальный список.
+        key = caches.versioned_key(
+            group_stats.NAME,
+            registry.version(),
+            sort,
+        )
+        groups = swr.get_or_set(
+            key,
+            lambda: list(
+                Group.objects.order_by(GROUP_ORDERINGS[sort])
+                [:settings.GROUP_DIRECTORY_SIZE]
+            ),
+            settings.GROUP_DIRECTORY_CACHE_TIMEOUT,
+        )
+    context = {
+        'groups': groups,
+        'sort': sort,
+        'sort_choices': (
+            ('active', 'Активные'),
+            ('size', 'Крупные'),
+            ('trending', 'Популярные'),
+        ),
+    }
+    return render(request, template, context)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = registry.get_by_slug_or_404(slug)
+    posts = CardFeed(
+        PostCard.objects.filter(group_id=group.id),
+        key=f'group:{group.id}',
+    )
+    page_obj = paginate(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -37,43 +102,89 @@ def group_posts(request, slug):
 
 def profile(request, username):
     template = 'posts/profile.html'
-    user = get_object_or_404(User, username=username)
-    if not request.user.is_authenticated:
-        following = False
-    else:
-        following = Follow.objects.filter(
-            author=user,
-            user=request.user,
-        ).exists()
-    post_list = user.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username,
+        is_active=True,
+    )
+    loaders.remember(request, user)
+    following = request.user.is_authenticated and follows.is_following(
+        request.user.id,
+        user.id,
+    )
+    post_list = CardFeed(
+        PostCard.objects.filter(author_id=user.id),
+        key=f'author:{user.id}',
+    )
+    page_obj = paginate(request, post_list)
     context = {
         'profile_user': user,
-        'post_count': post_count,
+        'post_count': page_obj.paginator.count,
         'page_obj': page_obj,
         'following': following,
+        'suggestions': (
+            suggestions.for_user(request.user)
+            if request.user.is_authenticated else []
+        ),
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
-    comments = post.comments.all()
-    post_count = post.author.posts.all().count()
+    post = get_post_or_404(post_id, bounded=True)
+    comments, next_cursor = comment_pages.get_page(post)
+    # Автор поста и авторы комментариев — одним запросом.
+    post, *comments = loaders.attach(request, [post, *comments])
+    view_counts.record(post.id, view_counts.viewer_key(request))
+    views, viewers = view_counts.get(post.id)
+    # Тот же ключ, что у ленты профиля: число берётся из кэша карточек.
+    post_count = CardFeed(
+        PostCard.objects.filter(author_id=post.author_id),
+        key=f'author:{post.author_id}',
+    ).count()
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'post_count': post_count,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'views': views,
+        'viewers': viewers,
     }
     return render(request, template, context)
 
 
+def comment_list(request, post_id):
+    """Следующая страница комментариев — фрагмент HTML."""
+    template = 'posts/includes/comments.html'
+    post = get_post_or_404(post_id, bounded=True)
+    comments, next_cursor = comment_pages.get_page(
+        post,
+        request.GET.get('after'),
+    )
+    context = {
+        'post': post,
+        'comments': loaders.attach(request, comments, fields=('author',)),
+        'next_cursor': next_cursor,
+    }
+    return render(request, template, context)
+
+
+def post_text(request, post_id):
+    """Полный текст длинного поста, отдаётся по кускам."""
+    post = get_post_or_404(post_id, bounded=True)
+    return StreamingHttpResponse(
+        rendering.stream_html(type(post), post.id, post.text_length),
+        content_type='text/html; charset=utf-8',
+    )
+
+
+def group_autocomplete(request):
+    return JsonResponse({'results': search_groups(request.GET.get('q', ''))})
+
+
 @login_required
 def post_create(request):
     template = 'posts/post_create.html'
@@ -85,7 +196,13 @@ def post_create(request):
         if form.is_valid():
             new_post = form.save(commit=False)
             new_post.author = request.user
-            new_post.save()
+            writer.save(new_post)
+            if new_post.image:
+                enqueue(
+                    make_thumbnails,
+                    args=(new_post.id,),
+                    dedup_key=f'thumbnails:{new_post.id}',
+                )
             return redirect('posts:profile', request.user)
         else:
             return render(request, template, {'form': form})
@@ -108,7 +225,13 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id)
     else:
         if form.is_valid():
-            form.save()
+            post = form.save()
+            if 'image' in form.changed_data and post.image:
+                enqueue(
+                    make_thumbnails,
+                    args=(post.id,),
+                    dedup_key=f'thumbnails:{post.id}',
+                )
             return redirect('posts:post_detail', post_id)
         else:
             return render(request, template, context)
@@ -120,48 +243,75 @@ def post_delete(request, post_id):
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
     else:
-        post.delete()
+        schedule_purge(post)
         return render(request, 'posts/post_delete.html')
 
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        writer.save(comment)
+        if request.is_ajax():
+            # Скрипту страницы нужен только новый комментарий.
+            return render(
+                request,
+                'posts/includes/comment.html',
+                {'comment': comment},
+                status=201,
+            )
+    elif request.is_ajax():
+        return render(
+            request,
+            'posts/includes/comment_form.html',
+            {'post': post, 'form': form},
+            status=400,
+        )
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    authors = list(follows.followees(request.user.id))
+    post_list = CardFeed(PostCard.objects.filter(author_id__in=authors))
+    page_obj = paginate(request, post_list)
     context = {
         'page_obj': page_obj,
+        'suggestions': suggestions.for_user(request.user),
+    }
+    return render(request, template, context)
+
+
+def _follow_list(request, username, title, get_page):
+    template = 'posts/follow_list.html'
+    user = get_object_or_404(User, username=username, is_active=True)
+    rows, next_cursor = get_page(user.id, request.GET.get('after'))
+    context = {
+        'profile_user': user,
+        'title': title,
+        'rows': rows,
+        'next_cursor': next_cursor,
     }
     return render(request, template, context)
 
 
+def follower_list(request, username):
+    return _follow_list(request, username, 'Подписчики', follows.followers)
+
+
+def following_list(request, username):
+    return _follow_list(request, username, 'Подписки', follows.following)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    following = Follow.objects.filter(
-        author=author,
-        user=request.user,
-    ).exists()
-    if request.user != author and following is False:
-        follow = Follow.objects.create(
-            author=author,
-            user=request.user,
-        )
-        follow.save()
+    if request.user != author and follows.follow(request.user, author):
         return redirect('posts:index')
     else:
         return redirect('posts:profile', request.user)
@@ -0,0 +1,147 @@
+"""Очередь записи с единственным писателем.
+
+SQLite допускает только одного писателя: при всплеске комментариев и
+новых постов потоки запросов выстраиваются за блокировкой базы, ловят
+`database is locked` и дают пики задержки. Если включён
+`WRITE_QUEUE_ENABLED`, вьюхи не сохраняют объекты сами, а передают их
+выделенному потоку-писателю, который раз в `WRITE_QUEUE_INTERVAL` секунд
+собирает накопившиеся вставки в одну транзакцию.
+
+Гарантии:
+
+* Порядок. Объекты сохраняются в том порядке, в котором попали в
+  очередь; внутри пачки порядок тот же, поэтому первичные ключи
+  растут в порядке поступления.
+* Долговечность. `save()` возвращает управление только после COMMIT
+  транзакции, в которую попал объект. Если пачка откатилась, каждый
+  объект повторяется в своей транзакции, и ошибка достаётся только
+  тому запросу, чей объект её вызвал.
+* Таймаут. Если за `WRITE_QUEUE_TIMEOUT` секунд писатель не взял объект
+  в работу, запись отменяется и поднимается `WriteTimeout` — такой
+  объект гарантированно не будет записан. Если писатель уже начал
+  транзакцию, запрос ждёт её результата ещё не дольше
+  `WRITE_QUEUE_COMMIT_TIMEOUT` секунд, а затем поднимает
+  `WriteUnconfirmed`: объект мог быть записан, а мог и нет.
+
+Очередь живёт внутри процесса: каждый воркер сервера держит своего
+писателя, так что между процессами блокировка SQLite по-прежнему
+разыгрывается, но уже не между всеми потоками.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+class WriteTimeout(Exception):
+    """Писатель не взял объект в работу за отведённое время."""
+
+
+class WriteUnconfirmed(Exception):
+    """Писатель начал транзакцию, но не завершил её за отведённое время."""
+
+
+class Writer:
+    def __init__(self, interval, max_batch, commit_timeout=None):
+        self.interval = interval
+        self.max_batch = max_batch
+        self.commit_timeout = commit_timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='posts-writer',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, instance, timeout=None):
+        future = Future()
+        self._queue.put((instance, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise WriteTimeout(
+                    f'Запись {instance!r} не начата за {timeout} с'
+                )
+        try:
+            return future.result(self.commit_timeout)
+        except FutureTimeoutError:
+            raise WriteUnconfirmed(
+                f'Транзакция с {instance!r} не завершилась за '
+                f'{self.commit_timeout} с'
+            )
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            batch = [
+                (instance, future) for instance, future in batch
+                if future.set_running_or_notify_cancel()
+            ]
+            if batch:
+                self._commit(batch)
+            close_old_connections()
+
+    def _commit(self, batch):
+        new = [instance for instance, _ in batch if instance.pk is None]
+        try:
+            with transaction.atomic():
+                for instance, _ in batch:
+                    instance.save()
+        except Exception:
+            # Откатившаяся транзакция оставила новым объектам ключи,
+            # которых нет в базе.
+            for instance in new:
+                instance.pk = None
+            for instance, future in batch:
+                self._commit_one(instance, future)
+        else:
+            for instance, future in batch:
+                future.set_result(instance)
+
+    def _commit_one(self, instance, future):
+        try:
+            with transaction.atomic():
+                instance.save()
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(instance)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = Writer(
+                settings.WRITE_QUEUE_INTERVAL,
+                settings.WRITE_QUEUE_MAX_BATCH,
+                settings.WRITE_QUEUE_COMMIT_TIMEOUT,
+            )
+    return _writer
+
+
+def save(instance):
+    """Сохраняет объект сразу или через очередь писателя."""
+    if not settings.WRITE_QUEUE_ENABLED:
+        instance.save()
+        return instance
+    return get_writer().submit(instance, settings.WRITE_QUEUE_TIMEOUT)
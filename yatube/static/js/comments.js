@@ -0,0 +1,63 @@
+// Комментарии на странице поста: следующие страницы подгружаются по
+// ссылке «ещё комментарии», новый комментарий добавляется без
+// перезагрузки страницы.
+(function () {
+  var list = document.querySelector('[data-comments]');
+  if (!list) {
+    return;
+  }
+
+  function fragment(html) {
+    var template = document.createElement('template');
+    template.innerHTML = html;
+    return template.content;
+  }
+
+  list.addEventListener('click', function (event) {
+    var more = event.target.closest('[data-comments-more]');
+    if (!more) {
+      return;
+    }
+    event.preventDefault();
+    fetch(more.href)
+      .then(function (response) { return response.text(); })
+      .then(function (html) {
+        var page = fragment(html);
+        // Свой только что добавленный комментарий уже на странице.
+        page.querySelectorAll('[id^="comment-"]').forEach(function (item) {
+          if (document.getElementById(item.id)) {
+            item.remove();
+          }
+        });
+        list.insertBefore(page, more);
+        more.remove();
+      });
+  });
+
+  function submit(event) {
+    event.preventDefault();
+    var form = event.target;
+    fetch(form.action, {
+      method: 'POST',
+      body: new FormData(form),
+      headers: {'X-Requested-With': 'XMLHttpRequest'},
+    }).then(function (response) {
+      return response.text().then(function (html) {
+        if (response.status === 201) {
+          list.appendChild(fragment(html));
+          form.reset();
+          return;
+        }
+        // Форма с ошибками приходит целиком.
+        var replacement = fragment(html).querySelector('[data-comment-form]');
+        replacement.addEventListener('submit', submit);
+        form.replaceWith(replacement);
+      });
+    });
+  }
+
+  var form = document.querySelector('[data-comment-form]');
+  if (form) {
+    form.addEventListener('submit', submit);
+  }
+})();
@@ -0,0 +1,54 @@
+// Подсказки для поля группы: запрос к серверу не чаще раза в 200 мс,
+// id выбранной группы пишется в скрытое поле формы.
+(function () {
+  var DELAY = 200;
+
+  function setup(input) {
+    var target = document.getElementById(input.dataset.target);
+    var list = document.getElementById(input.getAttribute('list'));
+    var timer = null;
+    var options = {};
+
+    function fill(results) {
+      list.innerHTML = '';
+      options = {};
+      results.forEach(function (group) {
+        var option = document.createElement('option');
+        option.value = group.title;
+        list.appendChild(option);
+        options[group.title] = group.id;
+      });
+    }
+
+    // Текст, не совпавший ни с одной подсказкой, сбрасывает выбор:
+    // иначе форма ушла бы с группой, выбранной раньше.
+    function pick() {
+      var value = input.value.trim();
+      target.value = options.hasOwnProperty(value) ? options[value] : '';
+    }
+
+    input.addEventListener('input', function () {
+      pick();
+      clearTimeout(timer);
+      var query = input.value.trim();
+      if (!query) {
+        fill([]);
+        return;
+      }
+      timer = setTimeout(function () {
+        var url = input.dataset.groupAutocomplete + '?q=' + encodeURIComponent(query);
+        fetch(url)
+          .then(function (response) { return response.json(); })
+          .then(function (data) {
+            fill(data.results);
+            pick();
+          });
+      }, DELAY);
+    });
+    input.addEventListener('change', pick);
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('[data-group-autocomplete]').forEach(setup);
+  });
+})();
@@ -0,0 +1,44 @@
+// Подсказки в поиске пользователей: запрос к серверу не чаще раза в
+// 200 мс, выбор подсказки сразу открывает профиль.
+(function () {
+  var DELAY = 200;
+
+  function setup(input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var timer = null;
+    var urls = {};
+
+    function fill(results) {
+      list.innerHTML = '';
+      urls = {};
+      results.forEach(function (user) {
+        var option = document.createElement('option');
+        option.value = user.username;
+        option.label = user.full_name;
+        list.appendChild(option);
+        urls[user.username] = user.url;
+      });
+    }
+
+    input.addEventListener('input', function () {
+      if (urls.hasOwnProperty(input.value)) {
+        window.location = urls[input.value];
+        return;
+      }
+      clearTimeout(timer);
+      var query = input.value.trim();
+      if (!query) {
+        fill([]);
+        return;
+      }
+      timer = setTimeout(function () {
+        var url = input.dataset.userAutocomplete + '?q=' + encodeURIComponent(query);
+        fetch(url)
+          .then(function (response) { return response.json(); })
+          .then(function (data) { fill(data.results); });
+      }, DELAY);
+    });
+  }
+
+  document.querySelectorAll('[data-user-autocomplete]').forEach(setup);
+})();
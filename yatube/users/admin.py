@@ -0,0 +1,15 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from posts.admin import purge_in_background
+
+User = get_user_model()
+
+
+class UserAdmin(BaseUserAdmin):
+    actions = (purge_in_background,)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
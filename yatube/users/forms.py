@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from jobs.queue import enqueue
+
+from .tasks import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +12,21 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо отправляется фоновой задачей, см. users/tasks.py."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        enqueue(
+            send_password_reset,
+            args=(
+                context['user'].pk,
+                to_email,
+                context['domain'],
+                context['protocol'] == 'https',
+            ),
+            priority=10,
+        )
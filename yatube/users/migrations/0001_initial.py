@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def normalize(text):
+    # core.search.normalize на момент миграции.
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def create_profiles(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Profile = apps.get_model('users', 'Profile')
+    users = User.objects.only('id', 'username', 'first_name', 'last_name')
+    batch = []
+    for user in users.order_by('id').iterator(chunk_size=1000):
+        batch.append(Profile(
+            user_id=user.id,
+            username_normalized=normalize(user.username),
+            full_name_normalized=normalize(
+                f'{user.first_name} {user.last_name}'
+            ),
+        ))
+        if len(batch) == 1000:
+            Profile.objects.bulk_create(batch)
+            batch = []
+    Profile.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('username_normalized', models.CharField(db_index=True, max_length=150)),
+                ('full_name_normalized', models.CharField(blank=True, db_index=True, max_length=300)),
+            ],
+        ),
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
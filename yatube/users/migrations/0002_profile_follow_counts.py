@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Profile = apps.get_model('users', 'Profile')
+
+    def counted(field):
+        return Coalesce(Subquery(
+            Follow.objects.filter(**{field: OuterRef('user_id')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('id'))
+            .values('count')
+        ), 0)
+
+    Profile.objects.update(
+        follower_count=counted('author_id'),
+        following_count=counted('user_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_follow_author_user_idx'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_follows, migrations.RunPython.noop),
+    ]
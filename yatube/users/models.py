@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    """Нормализованные имя пользователя и полное имя для поиска по
+    префиксу (users/search.py) и счётчики подписок (posts/follows.py)."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile',
+    )
+    username_normalized = models.CharField(max_length=150, db_index=True)
+    full_name_normalized = models.CharField(
+        max_length=300,
+        db_index=True,
+        blank=True,
+    )
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.username_normalized
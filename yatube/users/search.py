@@ -0,0 +1,78 @@
+"""Поиск пользователей по началу имени пользователя или полного имени.
+
+`Profile` хранит нормализованные строки в индексированных колонках и
+обновляется при каждом сохранении `User`; поиск — два диапазонных
+запроса по индексам, результаты ненадолго кэшируются.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.search import normalize, prefix_filter, prefix_key
+
+from .models import Profile
+
+User = get_user_model()
+
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+NAME_LENGTH = max(
+    Profile._meta.get_field(name).max_length
+    for name in ('username_normalized', 'full_name_normalized')
+)
+
+
+def sync_profile(user):
+    Profile.objects.update_or_create(
+        user=user,
+        defaults={
+            'username_normalized': normalize(user.username),
+            'full_name_normalized': normalize(
+                f'{user.first_name} {user.last_name}'
+            ),
+        },
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Вход в систему сохраняет только last_login — профиль не трогаем.
+    if update_fields is not None and not NAME_FIELDS & set(update_fields):
+        return
+    sync_profile(instance)
+
+
+def search_users(query, limit):
+    """До `limit` активных пользователей, у которых имя пользователя или
+    полное имя начинается с `query`."""
+    prefix = normalize(query)
+    # Префикс длиннее обеих колонок ни с чем не совпадёт.
+    if not prefix or len(prefix) > NAME_LENGTH:
+        return []
+    key = prefix_key('users:search', limit, prefix)
+    results = cache.get(key)
+    if results is not None:
+        return results
+    found = {}
+    for field in ('username_normalized', 'full_name_normalized'):
+        rows = (
+            Profile.objects.filter(
+                prefix_filter(field, prefix),
+                user__is_active=True,
+            )
+            .order_by(field)
+            .values_list(
+                'user__username',
+                'user__first_name',
+                'user__last_name',
+            )[:limit]
+        )
+        for username, first_name, last_name in rows:
+            found.setdefault(username, {
+                'username': username,
+                'full_name': f'{first_name} {last_name}'.strip(),
+            })
+    results = sorted(found.values(), key=lambda row: row['username'])[:limit]
+    cache.set(key, results, settings.USER_SEARCH_CACHE_TIMEOUT)
+    return results
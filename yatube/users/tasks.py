@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from jobs.queue import job
+
+User = get_user_model()
+
+RESET_SUBJECT_TEMPLATE = 'registration/password_reset_subject.txt'
+RESET_EMAIL_TEMPLATE = 'registration/password_reset_email.html'
+
+
+@job
+def send_password_reset(user_pk, email, domain, use_https):
+    """Письмо со ссылкой для сброса пароля.
+
+    Ссылка с одноразовым токеном собирается здесь, при выполнении: в
+    аргументах задачи, которые хранятся в базе и видны в админке, её нет.
+    """
+    user = User.objects.filter(pk=user_pk, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+    context = {
+        'email': email,
+        'domain': domain,
+        'site_name': domain,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': 'https' if use_https else 'http',
+    }
+    subject = loader.render_to_string(RESET_SUBJECT_TEMPLATE, context)
+    subject = ''.join(subject.splitlines())
+    body = loader.render_to_string(RESET_EMAIL_TEMPLATE, context)
+    send_mail(subject, body, None, [email])
@@ -0,0 +1,76 @@
+import warnings
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Profile
+
+User = get_user_model()
+
+
+class UserSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(
+            username='leo',
+            first_name='Лев',
+            last_name='Толстой',
+        )
+        User.objects.create_user(username='Leonid')
+        User.objects.create_user(
+            username='fedor',
+            first_name='Фёдор',
+            last_name='Достоевский',
+        )
+        User.objects.create_user(username='leon', is_active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def autocomplete(self, query):
+        response = self.client.get(
+            reverse('users:autocomplete'),
+            {'q': query},
+        )
+        return [row['username'] for row in response.json()['results']]
+
+    def test_profile_follows_user_changes(self):
+        user = User.objects.get(username='leo')
+        self.assertEqual(user.profile.full_name_normalized, 'лев толстой')
+        user.last_name = 'Николаевич'
+        user.save()
+        self.assertEqual(
+            Profile.objects.get(user=user).full_name_normalized,
+            'лев николаевич',
+        )
+
+    def test_prefix_matches_username_and_full_name(self):
+        self.assertEqual(self.autocomplete('LEO'), ['Leonid', 'leo'])
+        self.assertEqual(self.autocomplete('федор д'), ['fedor'])
+        self.assertEqual(self.autocomplete('лев'), ['leo'])
+        self.assertEqual(self.autocomplete(''), [])
+
+    def test_odd_queries_make_valid_keys(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            self.assertEqual(self.autocomplete('лев т'), ['leo'])
+            self.assertEqual(self.autocomplete('l' * 5000), [])
+
+    def test_results_link_to_profiles(self):
+        response = self.client.get(
+            reverse('users:autocomplete'),
+            {'q': 'fed'},
+        )
+        self.assertEqual(
+            response.json()['results'][0]['url'],
+            reverse('posts:profile', args=('fedor',)),
+        )
+
+    def test_search_page(self):
+        response = self.client.get(reverse('users:search'), {'q': 'лев'})
+        self.assertContains(response, 'Лев Толстой')
+        self.assertNotContains(response, 'fedor')
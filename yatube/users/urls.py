@@ -11,10 +11,21 @@ from django.contrib.auth.views import (
 from django.urls import path, reverse_lazy
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
 urlpatterns = [
+    path(
+        'search/',
+        views.search,
+        name='search',
+    ),
+    path(
+        'autocomplete/',
+        views.autocomplete,
+        name='autocomplete',
+    ),
     path(
         'signup/',
         views.SignUp.as_view(),
@@ -52,6 +63,7 @@ urlpatterns = [
     path(
         'password_reset/',
         PasswordResetView.as_view(
+            form_class=QueuedPasswordResetForm,
             template_name='users/password_reset_form.html',
             success_url=reverse_lazy('users:password_reset_done'),
         ),
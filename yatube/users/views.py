@@ -1,10 +1,34 @@
-from django.urls import reverse_lazy
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
 
 from .forms import CreationForm
+from .search import search_users
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+def autocomplete(request):
+    results = search_users(
+        request.GET.get('q', ''),
+        settings.USER_AUTOCOMPLETE_LIMIT,
+    )
+    return JsonResponse({'results': [
+        dict(row, url=reverse('posts:profile', args=(row['username'],)))
+        for row in results
+    ]})
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    context = {
+        'query': query,
+        'results': search_users(query, settings.USER_SEARCH_LIMIT),
+    }
+    return render(request, 'users/search.html', context)
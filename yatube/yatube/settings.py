@@ -46,17 +46,25 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'jobs.apps.JobsConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.LoadSheddingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ViewTracingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -147,8 +155,157 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.caches.InstrumentedLocMemCache',
+    },
+    # Общий для всех процессов кэш: версии ключей (core/caches.py) и
+    # корзины лимитов (core/ratelimit.py). Таблицу создаёт миграция
+    # core 0002.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'core_shared_cache',
+    },
 }
+# Сколько секунд процесс верит прочитанной версии, не сверяясь с общим
+# кэшем.
+CACHE_VERSION_TTL = 1
+
+THUMBNAIL_BACKEND = 'core.thumbnails.ThumbnailBackend'
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Очередь записи с одним писателем (posts/writer.py)
+WRITE_QUEUE_ENABLED = False
+WRITE_QUEUE_INTERVAL = 0.005
+WRITE_QUEUE_MAX_BATCH = 100
+WRITE_QUEUE_TIMEOUT = 5
+WRITE_QUEUE_COMMIT_TIMEOUT = 30
+
+# Архив старых постов (posts/archive.py)
+POSTS_ARCHIVE_AFTER_DAYS = 90
+POSTS_ARCHIVE_BATCH_SIZE = 500
+
+# Фоновое удаление каскадов (posts/purge.py)
+PURGE_BATCH_SIZE = 500
+PURGE_LEASE = 10 * 60
+
+# Фоновые задачи (jobs/queue.py, manage.py worker)
+JOBS_EAGER = False
+JOBS_PROCESSES = 4
+JOBS_POLL_INTERVAL = 1
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BACKOFF = 10
+JOBS_LEASE = 600
+# Как часто воркер продлевает аренду своих задач и забирает брошенные;
+# должно быть заметно меньше JOBS_LEASE.
+JOBS_REQUEUE_INTERVAL = 60
+
+# Метрики Prometheus (core/metrics.py, /metrics)
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 10
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Трассировка запросов (core/tracing.py)
+TRACING_SAMPLE_RATE = 0.0
+TRACING_KEEP_SLOWEST = 20
+
+# Профилирование запросов по токену (core/profiling.py)
+PROFILES_DIR = os.getenv('PROFILES_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+PROFILING_TRACEMALLOC_FRAMES = 1
+
+# Журнал медленных SQL-запросов (core/slowlog.py): порог в секундах,
+# None — журнал выключен
+SLOW_QUERY_THRESHOLD = None
+SLOW_QUERY_SAMPLES = 50
+SLOW_QUERY_FLUSH_INTERVAL = 5
+SLOW_QUERY_MAX_PENDING = 1000
+
+# Подсказки групп (posts/autocomplete.py)
+GROUP_AUTOCOMPLETE_LIMIT = 10
+GROUP_AUTOCOMPLETE_CACHE_TIMEOUT = 5 * 60
+
+# Поиск пользователей (users/search.py)
+USER_AUTOCOMPLETE_LIMIT = 10
+USER_SEARCH_LIMIT = 50
+USER_SEARCH_CACHE_TIMEOUT = 60
+
+# Готовый HTML текста постов (posts/rendering.py)
+POST_EXCERPT_LENGTH = 500
+POSTS_RENDER_BATCH_SIZE = 500
+POST_TEXT_STREAM_THRESHOLD = 100_000
+POST_TEXT_CHUNK_SIZE = 16_384
+POST_TEXT_CHUNKS_PER_QUERY = 8
+
+# Кэш карточек постов (posts/templatetags/post_cards.py)
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Карточки постов для лент (posts/cards.py)
+POST_CARDS_BATCH_SIZE = 500
+
+# Комментарии страницами по курсору (posts/comment_pages.py)
+COMMENTS_PER_PAGE = 50
+
+# Подписки пользователей в кэше и их списки (posts/follows.py)
+FOLLOW_CACHE_TIMEOUT = 24 * 60 * 60
+FOLLOW_LIST_PAGE_SIZE = 50
+
+# Рекомендации подписок (posts/suggestions.py)
+FOLLOW_SUGGESTIONS_TOP_K = 20
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTIONS_CHUNK_SIZE = 1000
+
+# Популярные посты и группы (posts/trending.py)
+TRENDING_HALF_LIFE = 24 * 60 * 60
+TRENDING_POST_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 0.5
+TRENDING_MIN_SCORE = 0.01
+TRENDING_BATCH_SIZE = 1000
+TRENDING_INTERVAL = 60
+TRENDING_SIZE = 20
+
+# Каталог групп (posts/group_stats.py)
+GROUP_DIRECTORY_SIZE = 100
+GROUP_DIRECTORY_CACHE_TIMEOUT = 10 * 60
+
+# Просмотры постов (posts/view_counts.py)
+POST_VIEWS_FLUSH_INTERVAL = 10
+POST_VIEWS_MAX_PENDING = 10_000
+POST_VIEWS_PRECISION = 10
+
+# Ограничение частоты запросов (core/ratelimit.py)
+RATE_LIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '30/m', 'methods': ['POST']},
+    'posts:add_comment': {'user': '20/m', 'ip': '60/m', 'methods': ['POST']},
+    'posts:profile_follow': {'user': '30/m', 'ip': '60/m'},
+    'posts:profile_unfollow': {'user': '30/m', 'ip': '60/m'},
+    'posts:index': {'user': '30/m', 'ip': '60/m', 'min_page': 20},
+    'posts:group_list': {'user': '30/m', 'ip': '60/m', 'min_page': 20},
+    'posts:profile': {'user': '30/m', 'ip': '60/m', 'min_page': 20},
+    'posts:follow_index': {'user': '30/m', 'min_page': 20},
+}
+
+# Сброс нагрузки (core/shedding.py)
+LOAD_SHED_MAX_IN_FLIGHT = 64
+LOAD_SHED_LATENCY = 2.0
+LOAD_SHED_ROUTES = {
+    'posts:index',
+    'posts:trending',
+    'posts:group_directory',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follower_list',
+    'posts:following_list',
+}
+LOAD_SHED_PARAMS = {'page', 'sort'}
+LOAD_SHED_STALE_TIMEOUT = 60 * 60
+LOAD_SHED_REFRESH_INTERVAL = 60
+LOAD_SHED_RETRY_AFTER = 30
+
+# Кэш со stale-while-revalidate (core/swr.py)
+CACHE_STALE_GRACE = 60
+CACHE_TTL_JITTER = 0.1
+CACHE_EARLY_EXPIRATION_BETA = 1.0
+CACHE_LOCK_TIMEOUT = 30
+# Сколько секунд запрос ждёт чужого пересчёта при промахе кэша.
+CACHE_MISS_WAIT = 0.5
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Потоки, сбрасывающие буферы в базу, нужны только процессам сервера.
+from core import background  # noqa: E402
+
+background.enable()